@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import frappe
+from frappe import _
+
+from custom_manufacturing.utils import archive
+
+
+@frappe.whitelist()
+def get_archived_job_card(job_card: str) -> dict:
+	frappe.has_permission("Job Card", "read", throw=True)
+
+	doc = archive.get_archived_job_card(job_card)
+	if not doc:
+		frappe.throw(
+			_("Job Card {0} is not archived.").format(frappe.bold(job_card)), frappe.DoesNotExistError
+		)
+
+	return doc
+
+
+@frappe.whitelist(methods=["POST"])
+def restore_archived_job_card(job_card: str) -> None:
+	"""Move an archived Job Card back into the live tables."""
+	frappe.has_permission("Job Card", "create", throw=True)
+	archive.restore_job_card(job_card)
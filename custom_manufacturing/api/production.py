@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import frappe
+from frappe import _
+
+ROLLUP_GROUP_FIELDS: tuple[str, ...] = ("posting_date", "plant", "shift", "workstation", "production_item")
+
+
+@frappe.whitelist()
+def get_shift_production(
+	from_date: str | None = None,
+	to_date: str | None = None,
+	plant: str | None = None,
+	group_by: str = "posting_date",
+) -> list[dict]:
+	"""Return production totals from the shift rollups grouped by one rollup dimension."""
+	frappe.has_permission("Job Card", "read", throw=True)
+
+	if group_by not in ROLLUP_GROUP_FIELDS:
+		frappe.throw(_("Cannot group production by {0}.").format(frappe.bold(group_by)))
+
+	conditions = ["job_card_count != 0"]
+	values: dict[str, object] = {}
+	if from_date:
+		conditions.append("posting_date >= %(from_date)s")
+		values["from_date"] = from_date
+	if to_date:
+		conditions.append("posting_date <= %(to_date)s")
+		values["to_date"] = to_date
+	if plant:
+		conditions.append("plant = %(plant)s")
+		values["plant"] = plant
+
+	where_clause = " AND ".join(conditions)
+
+	return frappe.db.sql(
+		f"""
+		SELECT
+			`{group_by}` AS `key`,
+			SUM(completed_qty) AS completed_qty,
+			SUM(process_loss_qty) AS process_loss_qty,
+			SUM(machine_time_mins) AS machine_time_mins,
+			SUM(job_card_count) AS job_card_count
+		FROM `tabShift Production Rollup`
+		WHERE {where_clause}
+		GROUP BY `{group_by}`
+		ORDER BY `{group_by}`
+		""",
+		values,
+		as_dict=True,
+	)
@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+import frappe
+from frappe import _
+
+from custom_manufacturing.utils.report_export import enqueue_export
+
+
+@frappe.whitelist()
+def start_export(report_name: str, filters: str | dict | None = None, file_format: str = "CSV") -> None:
+	"""Queue a streaming export; the user is notified with a download link when it is ready."""
+	if not frappe.get_cached_doc("Report", report_name).is_permitted():
+		frappe.throw(
+			_("Not permitted to export {0}.").format(frappe.bold(report_name)), frappe.PermissionError
+		)
+
+	enqueue_export(report_name, frappe.parse_json(filters) or {}, file_format)
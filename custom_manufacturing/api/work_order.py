@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import frappe
-from frappe.utils import flt
+from frappe.utils import cint
+
+from custom_manufacturing.utils.production_counter import get_manufactured_qty
 
 
 @frappe.whitelist()
@@ -10,13 +12,11 @@ def get_total_manufactured_qty(work_order: str | None = None) -> float:
     if not work_order:
         return 0.0
 
-    total = frappe.db.sql(
-        """
-        SELECT COALESCE(SUM(total_completed_qty), 0)
-        FROM `tabJob Card`
-        WHERE docstatus = 1 AND work_order = %s
-        """,
-        (work_order,),
-    )[0][0]
+    return get_manufactured_qty([work_order])[work_order]["total_qty"]
+
 
-    return flt(total or 0)
+@frappe.whitelist()
+def get_total_manufactured_qty_batch(work_orders: str | list[str], by_operation: int = 0) -> dict[str, dict]:
+    """Return manufactured quantity for many work orders, optionally broken down by operation."""
+    frappe.has_permission("Work Order", "read", throw=True)
+    return get_manufactured_qty(frappe.parse_json(work_orders) or [], by_operation=cint(by_operation))
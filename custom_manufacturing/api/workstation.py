@@ -3,6 +3,8 @@ from __future__ import annotations
 import frappe
 from frappe import _
 
+from custom_manufacturing.utils.workstation_status import get_snapshot
+
 
 @frappe.whitelist()
 def reset_worked_hours(workstation: str) -> None:
@@ -16,3 +18,13 @@ def reset_worked_hours(workstation: str) -> None:
     frappe.db.set_value("Workstation", workstation, "custom_worked_hours", 0, update_modified=False)
     current_value = frappe.db.get_value("Workstation", workstation, "custom_worked_hours")
     return {"success": True, "worked_hours": current_value or 0}
+
+
+@frappe.whitelist()
+def get_live_status(plant_floor: str) -> list[dict]:
+    """Return the live state of every workstation on a plant floor.
+
+    Subscribe to the Plant Floor document for ``workstation_status`` realtime deltas.
+    """
+    frappe.has_permission("Workstation", "read", throw=True)
+    return get_snapshot(plant_floor)
@@ -0,0 +1,47 @@
+"""Bench commands for the Custom Manufacturing app."""
+
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("backfill-work-order-batches")
+@click.option("--chunk-size", default=500, type=int, help="Stock Entries processed per commit")
+@pass_context
+def backfill_work_order_batches(context, chunk_size):
+	"""Rebuild the Work Order Batch mapping from submitted Stock Entries."""
+	import frappe
+
+	from custom_manufacturing.utils.work_order_batch import backfill
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		total = backfill(chunk_size=chunk_size)
+		click.echo(f"Recorded {total} work order batch rows")
+	finally:
+		frappe.destroy()
+
+
+@click.command("cleanup-open-job-cards")
+@click.option("--batch-size", default=500, type=int, help="Job Cards deleted per commit")
+@click.option("--dry-run", is_flag=True, default=False, help="Only report what would be deleted")
+@pass_context
+def cleanup_open_job_cards(context, batch_size, dry_run):
+	"""Delete stale Open draft Job Cards and their child rows."""
+	import frappe
+
+	from custom_manufacturing.scheduler.job_card_cleanup import delete_old_open_job_cards
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		totals = delete_old_open_job_cards(dry_run=dry_run, batch_size=batch_size)
+		for table, count in sorted(totals.items()):
+			click.echo(f"{table}: {count}")
+	finally:
+		frappe.destroy()
+
+
+commands = [backfill_work_order_batches, cleanup_open_job_cards]
@@ -21,4 +21,33 @@ frappe.query_reports["Job Card Shift Summary"] = {
 			options: "Plant Floor",
 		},
 	],
+
+	onload(report) {
+		report.page.add_inner_button(__("Export in Background"), () => {
+			frappe.prompt(
+				{
+					fieldname: "file_format",
+					label: __("Format"),
+					fieldtype: "Select",
+					options: ["CSV", "Excel"],
+					default: "CSV",
+				},
+				({ file_format }) => {
+					frappe.call({
+						method: "custom_manufacturing.api.report.start_export",
+						args: {
+							report_name: report.report_name,
+							filters: report.get_filter_values(),
+							file_format,
+						},
+						callback: () => {
+							frappe.show_alert(__("Export queued. You will be notified when the file is ready."));
+						},
+					});
+				},
+				__("Export {0}", [__(report.report_name)]),
+				__("Export")
+			);
+		});
+	},
 };
@@ -1,23 +1,78 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+from collections.abc import Iterator
 
 import frappe
 from frappe import _
 
+from custom_manufacturing.utils.archive import get_job_card_source
+from custom_manufacturing.utils.report_cache import get_table_watermark, run_cached
+from custom_manufacturing.utils.shift import get_shift_columns
+from custom_manufacturing.utils.work_order_batch import get_last_changed
+
 
 def execute(filters: dict | None = None):
 	"""Build a shift-wise summary of Job Cards within the selected date/plant filters."""
 	filters = frappe._dict(filters or {})
+	shift_columns = get_shift_columns()
+
+	return run_cached(
+		"Job Card Shift Summary",
+		filters,
+		get_watermark(filters, shift_columns),
+		lambda: (get_columns(shift_columns), get_data(filters, shift_columns)),
+	)
 
-	columns = get_columns()
-	data = get_data(filters)
 
-	return columns, data
+def get_export(filters: frappe._dict) -> tuple[list[dict], Iterator[dict]]:
+	shift_columns = get_shift_columns()
+	return get_columns(shift_columns), iter_data(filters, shift_columns)
+
+
+def iter_data(filters: frappe._dict, shift_columns: list[dict], chunk_size: int = 500) -> Iterator[dict]:
+	"""Yield report rows a chunk of production items at a time, ordered by item code."""
+	where_clause, values = get_conditions(filters, "r", "plant")
+	# items are keyed by IFNULL(production_item, '') so the "Unknown Item" group is paged too
+	values.update(limit=chunk_size, last_item=None)
+
+	while True:
+		items = frappe.db.sql_list(
+			f"""
+			SELECT DISTINCT IFNULL(r.production_item, '') AS item_key
+			FROM `tabShift Production Rollup` r
+			WHERE {where_clause} and r.job_card_count != 0
+				and (%(last_item)s IS NULL or IFNULL(r.production_item, '') > %(last_item)s)
+			ORDER BY item_key
+			LIMIT %(limit)s
+			""",
+			values,
+		)
+		if not items:
+			break
+
+		yield from get_data(frappe._dict(filters, production_items=items), shift_columns)
+		values["last_item"] = items[-1]
+
+
+def get_watermark(filters: frappe._dict, shift_columns: list[dict]) -> tuple:
+	where_clause, values = get_conditions(filters, "r", "plant")
+
+	return (
+		[row["fieldname"] for row in shift_columns],
+		get_table_watermark(
+			"Shift Production Rollup",
+			where_clause,
+			values,
+			"SUM(r.completed_qty), SUM(r.job_card_count)",
+			alias="r",
+		),
+		get_table_watermark("Shift Scrap Rollup", where_clause, values, "SUM(r.scrap_qty)", alias="r"),
+		get_last_changed(),
+	)
 
 
-def get_columns() -> list[dict]:
-	return [
+def get_columns(shift_columns: list[dict]) -> list[dict]:
+	columns = [
 		{
 			"label": _("Items"),
 			"fieldname": "metric",
@@ -36,204 +91,164 @@ def get_columns() -> list[dict]:
 			"fieldtype": "Float",
 			"width": 130,
 		},
-		{
-			"label": _("Shift 1 Qty"),
-			"fieldname": "shift_1_qty",
-			"fieldtype": "Float",
-			"width": 120,
-		},
-		{
-			"label": _("Shift 2 Qty"),
-			"fieldname": "shift_2_qty",
-			"fieldtype": "Float",
-			"width": 120,
-		},
-		{
-			"label": _("Shift 3 Qty"),
-			"fieldname": "shift_3_qty",
-			"fieldtype": "Float",
-			"width": 120,
-		},
 	]
 
+	for shift in shift_columns:
+		columns.append(
+			{
+				"label": shift["label"],
+				"fieldname": shift["fieldname"],
+				"fieldtype": "Float",
+				"width": 120,
+			}
+		)
 
-def get_data(filters: frappe._dict) -> list[dict]:
-	job_cards = fetch_job_cards(filters)
-	if not job_cards:
-		return []
+	return columns
 
-	data: list[dict] = []
 
-	item_totals: dict[str, dict[str, float]] = {}
-	item_labels: dict[str, str] = {}
-	item_work_orders: dict[str, set[str]] = {}
-	shift_lookup: dict[str, tuple[str | None, str, str]] = {}
+def get_data(filters: frappe._dict, shift_columns: list[dict]) -> list[dict]:
+	production_rows = fetch_production_rollups(filters)
+	if not production_rows:
+		return []
 
-	for jc in job_cards:
-		item_code = jc.production_item or _("Unknown Item")
-		display_label = jc.item_name or jc.production_item or _("Unknown Item")
-		item_labels[item_code] = display_label
-		item_work_orders.setdefault(item_code, set()).add(jc.work_order)
+	shift_index = {row["shift"]: idx for idx, row in enumerate(shift_columns)}
+	shift_fieldnames = [row["fieldname"] for row in shift_columns]
+	shift_count = len(shift_fieldnames)
 
-		entry = item_totals.setdefault(item_code, {"shift_1_qty": 0.0, "shift_2_qty": 0.0, "shift_3_qty": 0.0})
+	item_totals: dict[str | None, list[float]] = {}
+	item_labels: dict[str | None, str] = {}
 
-		shift_key = get_shift_key(jc.custom_shift_number)
-		if shift_key:
-			entry[shift_key] = entry.get(shift_key, 0.0) + (jc.total_completed_qty or 0.0)
+	for row in production_rows:
+		item_labels[row.production_item] = row.item_name or row.production_item or _("Unknown Item")
 
-		shift_lookup[jc.name] = (shift_key, item_code, jc.work_order)
+		totals = item_totals.get(row.production_item)
+		if totals is None:
+			totals = item_totals[row.production_item] = [0.0] * shift_count
 
-	work_order_batches = fetch_work_order_batches({jc.work_order for jc in job_cards})
+		idx = shift_index.get(row.shift)
+		if idx is not None:
+			totals[idx] += row.qty or 0.0
 
-	item_batches: dict[str, set[str]] = {}
-	for item_code, work_orders in item_work_orders.items():
-		batch_set: set[str] = set()
-		for wo in work_orders:
-			batch_set.update(work_order_batches.get(wo, set()))
-		if batch_set:
-			item_batches[item_code] = batch_set
+	scrap_totals: dict[str | None, dict[str, list[float]]] = {}
+	for row in fetch_scrap_rollups(filters):
+		idx = shift_index.get(row.shift)
+		if idx is None:
+			continue
 
-	scrap_rows = fetch_scrap_items([jc.name for jc in job_cards])
-	scrap_totals: dict[str, dict[str, dict[str, float]]] = {}
+		scrap_label = row.scrap_label or _("Co-Product")
+		totals = scrap_totals.setdefault(row.production_item, {}).get(scrap_label)
+		if totals is None:
+			totals = scrap_totals[row.production_item][scrap_label] = [0.0] * shift_count
 
-	for row in scrap_rows:
-		shift_key, item_code, work_order = shift_lookup.get(row.parent, (None, None, None))
-		if not shift_key or not item_code:
-			continue
+		totals[idx] += row.qty or 0.0
 
-		item_label = row.item_name or row.item_code or _("Co-Product")
-		item_scrap = scrap_totals.setdefault(item_code, {})
-		entry = item_scrap.setdefault(item_label, {"shift_1_qty": 0.0, "shift_2_qty": 0.0, "shift_3_qty": 0.0})
-		entry[shift_key] = entry.get(shift_key, 0.0) + (row.stock_qty or 0.0)
-
-	for item_code in sorted(item_totals, key=lambda x: item_labels.get(x, x)):
-		entry = {
-			"metric": item_labels.get(item_code, item_code),
-			"shift_1_qty": item_totals[item_code].get("shift_1_qty", 0.0),
-			"shift_2_qty": item_totals[item_code].get("shift_2_qty", 0.0),
-			"shift_3_qty": item_totals[item_code].get("shift_3_qty", 0.0),
-		}
-		entry["batch_numbers"] = ", ".join(sorted(item_batches.get(item_code, set())))
-		entry["total_qty"] = (
-			(entry.get("shift_1_qty") or 0.0)
-			+ (entry.get("shift_2_qty") or 0.0)
-			+ (entry.get("shift_3_qty") or 0.0)
+	item_batches = fetch_item_batches(filters)
+
+	data: list[dict] = []
+	for item_code in sorted(item_totals, key=lambda x: item_labels.get(x) or ""):
+		data.append(
+			make_row(
+				item_labels[item_code],
+				item_totals[item_code],
+				shift_fieldnames,
+				batch_numbers=", ".join(sorted(item_batches.get(item_code, ()))),
+			)
 		)
-		data.append(entry)
-
-		for scrap_label in sorted(scrap_totals.get(item_code, {})):
-			scrap_entry = {
-				"metric": _("Co-Product: {0}").format(scrap_label),
-				"shift_1_qty": scrap_totals[item_code][scrap_label].get("shift_1_qty", 0.0),
-				"shift_2_qty": scrap_totals[item_code][scrap_label].get("shift_2_qty", 0.0),
-				"shift_3_qty": scrap_totals[item_code][scrap_label].get("shift_3_qty", 0.0),
-			}
-			scrap_entry["batch_numbers"] = ""
-			scrap_entry["total_qty"] = (
-				(scrap_entry.get("shift_1_qty") or 0.0)
-				+ (scrap_entry.get("shift_2_qty") or 0.0)
-				+ (scrap_entry.get("shift_3_qty") or 0.0)
+
+		item_scrap = scrap_totals.get(item_code, {})
+		for scrap_label in sorted(item_scrap):
+			data.append(
+				make_row(_("Co-Product: {0}").format(scrap_label), item_scrap[scrap_label], shift_fieldnames)
 			)
-			data.append(scrap_entry)
 
 	return data
 
 
-def fetch_job_cards(filters: frappe._dict) -> Iterable[frappe._dict]:
-	conditions = ["docstatus = 1"]
+def make_row(metric: str, totals: list[float], shift_fieldnames: list[str], batch_numbers: str = "") -> dict:
+	row = {"metric": metric, "batch_numbers": batch_numbers, "total_qty": sum(totals)}
+	row.update(zip(shift_fieldnames, totals, strict=True))
+	return row
+
+
+def get_conditions(filters: frappe._dict, alias: str, plant_field: str) -> tuple[str, dict[str, object]]:
+	conditions: list[str] = []
 	values: dict[str, object] = {}
 
 	if filters.from_date:
-		conditions.append("posting_date >= %(from_date)s")
+		conditions.append(f"{alias}.posting_date >= %(from_date)s")
 		values["from_date"] = filters.from_date
 	if filters.to_date:
-		conditions.append("posting_date <= %(to_date)s")
+		conditions.append(f"{alias}.posting_date <= %(to_date)s")
 		values["to_date"] = filters.to_date
 	if filters.plant:
-		conditions.append("custom_plant_name = %(plant)s")
+		conditions.append(f"{alias}.{plant_field} = %(plant)s")
 		values["plant"] = filters.plant
+	if filters.production_items:
+		# '' stands for rows without a production item, shown as "Unknown Item"
+		conditions.append(f"IFNULL({alias}.production_item, '') in %(production_items)s")
+		values["production_items"] = tuple(filters.production_items)
+
+	return " and ".join(conditions) or "1 = 1", values
+
 
-	where_clause = " and ".join(conditions)
+def fetch_production_rollups(filters: frappe._dict) -> list[frappe._dict]:
+	where_clause, values = get_conditions(filters, "r", "plant")
 
 	return frappe.db.sql(
 		f"""
 		SELECT
-			name,
-			custom_shift_number,
-			total_completed_qty,
-			production_item,
-			item_name,
-			work_order
-		FROM `tabJob Card`
-		WHERE {where_clause}
+			r.production_item,
+			item.item_name,
+			r.shift,
+			SUM(r.completed_qty) AS qty
+		FROM `tabShift Production Rollup` r
+		LEFT JOIN `tabItem` item ON item.name = r.production_item
+		WHERE {where_clause} and r.job_card_count != 0
+		GROUP BY r.production_item, r.shift
 		""",
 		values,
 		as_dict=True,
 	)
 
 
-def fetch_scrap_items(job_card_names: list[str]) -> Iterable[frappe._dict]:
-	if not job_card_names:
-		return []
+def fetch_scrap_rollups(filters: frappe._dict) -> list[frappe._dict]:
+	where_clause, values = get_conditions(filters, "r", "plant")
 
 	return frappe.db.sql(
-		"""
-		SELECT parent, item_code, item_name, stock_qty
-		FROM `tabJob Card Scrap Item`
-		WHERE parent IN %(parents)s
+		f"""
+		SELECT
+			r.production_item,
+			r.shift,
+			COALESCE(NULLIF(r.scrap_item_name, ''), r.scrap_item_code) AS scrap_label,
+			SUM(r.scrap_qty) AS qty
+		FROM `tabShift Scrap Rollup` r
+		WHERE {where_clause} and r.scrap_qty != 0
+		GROUP BY r.production_item, r.shift, scrap_label
 		""",
-		{"parents": tuple(job_card_names)},
+		values,
 		as_dict=True,
 	)
 
 
-def fetch_work_order_batches(work_orders: set[str]) -> dict[str, set[str]]:
-	if not work_orders:
-		return {}
-
-	work_orders_tuple = tuple(work_orders)
+def fetch_item_batches(filters: frappe._dict) -> dict[str | None, set[str]]:
+	where_clause, values = get_conditions(filters, "jc", "custom_plant_name")
+	job_cards = get_job_card_source(
+		("production_item", "work_order", "docstatus", "posting_date", "custom_plant_name"), filters.from_date
+	)
 
 	rows = frappe.db.sql(
-		"""
-		SELECT DISTINCT se.work_order, sed.batch_no
-		FROM `tabStock Entry` se
-		INNER JOIN `tabStock Entry Detail` sed ON sed.parent = se.name
-		WHERE se.docstatus = 1
-			AND se.work_order IN %(work_orders)s
-			AND COALESCE(sed.batch_no, '') != ''
-
-		UNION
-
-		SELECT DISTINCT se.work_order, sbe.batch_no
-		FROM `tabStock Entry` se
-		INNER JOIN `tabStock Entry Detail` sed ON sed.parent = se.name
-		INNER JOIN `tabSerial and Batch Entry` sbe ON sbe.parent = sed.serial_and_batch_bundle
-		WHERE se.docstatus = 1
-			AND se.work_order IN %(work_orders)s
-			AND COALESCE(sed.serial_and_batch_bundle, '') != ''
-			AND COALESCE(sbe.batch_no, '') != ''
+		f"""
+		SELECT DISTINCT jc.production_item, wob.batch_no
+		FROM {job_cards} jc
+		INNER JOIN `tabWork Order Batch` wob ON wob.work_order = jc.work_order
+		WHERE jc.docstatus = 1 and {where_clause}
 		""",
-		{"work_orders": work_orders_tuple},
+		values,
 		as_dict=True,
 	)
 
-	result: dict[str, set[str]] = {}
+	result: dict[str | None, set[str]] = {}
 	for row in rows:
-		result.setdefault(row.work_order, set()).add(row.batch_no)
+		result.setdefault(row.production_item, set()).add(row.batch_no)
 
 	return result
-
-
-def get_shift_key(shift_name: str | None) -> str | None:
-	if not shift_name:
-		return None
-
-	value = shift_name.strip().lower()
-	if "1" in value or value.endswith("one"):
-		return "shift_1_qty"
-	if "2" in value or value.endswith("two"):
-		return "shift_2_qty"
-	if "3" in value or value.endswith("three"):
-		return "shift_3_qty"
-
-	return None
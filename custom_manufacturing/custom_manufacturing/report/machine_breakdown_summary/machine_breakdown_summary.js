@@ -10,5 +10,47 @@ frappe.query_reports["Machine Breakdown Summary"] = {
 			label: __("To Date"),
 			fieldtype: "Date",
 		},
+		{
+			fieldname: "workstation",
+			label: __("Workstation"),
+			fieldtype: "Link",
+			options: "Workstation",
+		},
+		{
+			fieldname: "period",
+			label: __("Trend Period"),
+			fieldtype: "Select",
+			options: ["Weekly", "Monthly"],
+			default: "Monthly",
+		},
 	],
+
+	onload(report) {
+		report.page.add_inner_button(__("Export in Background"), () => {
+			frappe.prompt(
+				{
+					fieldname: "file_format",
+					label: __("Format"),
+					fieldtype: "Select",
+					options: ["CSV", "Excel"],
+					default: "CSV",
+				},
+				({ file_format }) => {
+					frappe.call({
+						method: "custom_manufacturing.api.report.start_export",
+						args: {
+							report_name: report.report_name,
+							filters: report.get_filter_values(),
+							file_format,
+						},
+						callback: () => {
+							frappe.show_alert(__("Export queued. You will be notified when the file is ready."));
+						},
+					});
+				},
+				__("Export {0}", [__(report.report_name)]),
+				__("Export")
+			);
+		});
+	},
 };
@@ -1,16 +1,37 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
+
 import frappe
 from frappe import _
+from frappe.utils import add_days, flt, get_datetime, getdate
+
+from custom_manufacturing.utils.report_cache import get_table_watermark, run_cached
+
+PERIOD_BUCKETS = {
+	"Weekly": "DATE_SUB(posting_date, INTERVAL WEEKDAY(posting_date) DAY)",
+	"Monthly": "DATE_SUB(posting_date, INTERVAL DAYOFMONTH(posting_date) - 1 DAY)",
+}
 
 
 def execute(filters: dict | None = None):
 	filters = frappe._dict(filters or {})
+	where_clause, values = get_conditions(filters)
+	watermark = get_table_watermark("Machine Breakdown Event", where_clause, values, "SUM(downtime_mins)")
+
+	return run_cached("Machine Breakdown Summary", filters, watermark, lambda: get_result(filters))
+
+
+def get_export(filters: frappe._dict) -> tuple[list[dict], Iterator[dict]]:
+	return get_columns(), iter_data(filters)
+
+
+def get_result(filters: frappe._dict):
 	columns = get_columns()
 	data = get_data(filters)
 	summary = build_summary(data)
-	chart = build_chart(data)
-	return columns, data, summary, chart
+	chart = build_chart(get_trend(filters), filters.get("period") or "Monthly")
+	return columns, data, None, chart, summary
 
 
 def get_columns() -> list[dict]:
@@ -35,16 +56,29 @@ def get_columns() -> list[dict]:
 			"fieldtype": "Int",
 			"width": 140,
 		},
+		{
+			"label": _("Downtime (Mins)"),
+			"fieldname": "downtime_mins",
+			"fieldtype": "Float",
+			"width": 140,
+		},
+		{
+			"label": _("Machine Downtime (Mins)"),
+			"fieldname": "machine_downtime_mins",
+			"fieldtype": "Float",
+			"width": 180,
+		},
+		{
+			"label": _("Machine MTBF (Hours)"),
+			"fieldname": "mtbf_hours",
+			"fieldtype": "Float",
+			"width": 170,
+		},
 	]
 
 
-def get_data(filters: frappe._dict) -> list[dict]:
-	conditions: list[str] = [
-		"docstatus < 2",
-		"COALESCE(custom_breakdown_type, '') != ''",
-		"COALESCE(workstation, '') != ''",
-	]
-
+def get_conditions(filters: frappe._dict) -> tuple[str, dict[str, object]]:
+	conditions: list[str] = ["1 = 1"]
 	values: dict[str, object] = {}
 
 	if filters.get("from_date"):
@@ -55,24 +89,117 @@ def get_data(filters: frappe._dict) -> list[dict]:
 		conditions.append("posting_date <= %(to_date)s")
 		values["to_date"] = filters.to_date
 
-	where_clause = " AND ".join(conditions)
+	if filters.get("workstation"):
+		conditions.append("workstation = %(workstation)s")
+		values["workstation"] = filters.workstation
+
+	return " AND ".join(conditions), values
+
+
+def get_data(filters: frappe._dict) -> list[dict]:
+	where_clause, values = get_conditions(filters)
+	rows = frappe.db.sql(get_data_query(where_clause), values, as_dict=True)
+	return list(add_machine_reliability(rows, get_machine_reliability(filters)))
+
+
+def iter_data(filters: frappe._dict) -> Iterator[dict]:
+	"""Stream report rows from an unbuffered cursor.
+
+	Reliability figures are fetched first, one row per machine, since no other query
+	can run while the unbuffered result is being read.
+	"""
+	machines = get_machine_reliability(filters)
+	where_clause, values = get_conditions(filters)
+
+	with frappe.db.unbuffered_cursor():
+		rows = frappe.db.sql(get_data_query(where_clause), values, as_dict=True, as_iterator=True)
+		yield from add_machine_reliability(rows, machines)
+
+
+def get_data_query(where_clause: str) -> str:
+	return f"""
+		SELECT
+			workstation,
+			breakdown_type,
+			COUNT(*) AS breakdown_count,
+			SUM(downtime_mins) AS downtime_mins
+		FROM `tabMachine Breakdown Event`
+		WHERE {where_clause}
+		GROUP BY workstation, breakdown_type
+		ORDER BY workstation ASC, breakdown_count DESC
+	"""
+
+
+def add_machine_reliability(rows, machines: dict[str, dict]) -> Iterator[dict]:
+	for row in rows:
+		machine = machines.get(row.workstation) or {}
+		row.machine_downtime_mins = machine.get("downtime_mins")
+		row.mtbf_hours = machine.get("mtbf_hours")
+		yield row
+
+
+def get_machine_reliability(filters: frappe._dict) -> dict[str, dict]:
+	"""Return downtime and MTBF per workstation.
+
+	MTBF is the machine's uptime over the reporting window divided by its number of
+	breakdowns. Without a date filter the window spans the first to the last event.
+	"""
+	where_clause, values = get_conditions(filters)
 
 	rows = frappe.db.sql(
 		f"""
 		SELECT
 			workstation,
-			custom_breakdown_type AS breakdown_type,
-			COUNT(*) AS breakdown_count
-		FROM `tabJob Card`
+			COUNT(*) AS failures,
+			SUM(downtime_mins) AS downtime_mins,
+			MIN(COALESCE(start_time, posting_date)) AS first_event,
+			MAX(COALESCE(end_time, start_time, posting_date)) AS last_event
+		FROM `tabMachine Breakdown Event`
 		WHERE {where_clause}
-		GROUP BY workstation, custom_breakdown_type
-		ORDER BY workstation ASC, breakdown_count DESC
+		GROUP BY workstation
 		""",
 		values,
 		as_dict=True,
 	)
+	if not rows:
+		return {}
 
-	return rows
+	window_start = get_datetime(filters.from_date) if filters.get("from_date") else None
+	window_end = get_datetime(add_days(filters.to_date, 1)) if filters.get("to_date") else None
+	window_start = window_start or min(get_datetime(row.first_event) for row in rows)
+	window_end = window_end or max(get_datetime(row.last_event) for row in rows)
+	window_mins = max((window_end - window_start).total_seconds() / 60, 0)
+
+	result: dict[str, dict] = {}
+	for row in rows:
+		downtime = flt(row.downtime_mins)
+		uptime = max(window_mins - downtime, 0)
+		result[row.workstation] = {
+			"downtime_mins": downtime,
+			"mtbf_hours": flt(uptime / 60 / row.failures, 2) if row.failures else None,
+		}
+
+	return result
+
+
+def get_trend(filters: frappe._dict) -> list[dict]:
+	where_clause, values = get_conditions(filters)
+	bucket = PERIOD_BUCKETS.get(filters.get("period") or "Monthly", PERIOD_BUCKETS["Monthly"])
+
+	return frappe.db.sql(
+		f"""
+		SELECT
+			{bucket} AS period_start,
+			COUNT(*) AS breakdown_count,
+			SUM(downtime_mins) AS downtime_mins
+		FROM `tabMachine Breakdown Event`
+		WHERE {where_clause} AND posting_date IS NOT NULL
+		GROUP BY period_start
+		ORDER BY period_start
+		""",
+		values,
+		as_dict=True,
+	)
 
 
 def build_summary(data: list[dict]) -> list[dict] | None:
@@ -82,6 +209,7 @@ def build_summary(data: list[dict]) -> list[dict] | None:
 	total_breakdowns = sum(int(row.get("breakdown_count") or 0) for row in data)
 	machines_impacted = len({row.get("workstation") for row in data if row.get("workstation")})
 	breakdown_variety = len({row.get("breakdown_type") for row in data if row.get("breakdown_type")})
+	total_downtime = flt(sum(flt(row.get("downtime_mins")) for row in data), 2)
 
 	return [
 		{
@@ -99,57 +227,42 @@ def build_summary(data: list[dict]) -> list[dict] | None:
 			"label": _("Breakdown Types"),
 			"indicator": "Green",
 		},
+		{
+			"value": total_downtime,
+			"label": _("Total Downtime (Mins)"),
+			"indicator": "Orange",
+			"datatype": "Float",
+		},
 	]
 
 
-def build_chart(data: list[dict]) -> dict | None:
-	if not data:
-		return None
-
-	by_machine: dict[str, int] = {}
-	by_breakdown: dict[str, int] = {}
-	for row in data:
-		machine = row.get("workstation")
-		breakdown = row.get("breakdown_type")
-		count = int(row.get("breakdown_count") or 0)
-
-		if machine:
-			by_machine[machine] = by_machine.get(machine, 0) + count
-		if breakdown:
-			by_breakdown[breakdown] = by_breakdown.get(breakdown, 0) + count
-
-	if not by_machine:
+def build_chart(trend: list[dict], period: str) -> dict | None:
+	if not trend:
 		return None
 
-	top_machines = sorted(by_machine.items(), key=lambda item: item[1], reverse=True)[:10]
-	machine_labels = [name for name, _ in top_machines]
-	machine_counts = [count for _, count in top_machines]
-
-	legend_note = ""
-	if len(by_machine) > 10:
-		legend_note = _(" (Top 10)")
-
-	overall_breakdowns = sum(by_breakdown.values())
+	date_format = "%d-%m-%Y" if period == "Weekly" else "%b %Y"
+	labels = [getdate(row.period_start).strftime(date_format) for row in trend]
+	overall_breakdowns = sum(int(row.breakdown_count or 0) for row in trend)
 
 	return {
 		"data": {
-			"labels": machine_labels,
+			"labels": labels,
 			"datasets": [
 				{
-					"name": _("Breakdowns") + legend_note,
-					"values": machine_counts,
-				}
+					"name": _("Breakdowns"),
+					"chartType": "bar",
+					"values": [int(row.breakdown_count or 0) for row in trend],
+				},
+				{
+					"name": _("Downtime (Hours)"),
+					"chartType": "line",
+					"values": [flt(flt(row.downtime_mins) / 60, 2) for row in trend],
+				},
 			],
 		},
-		"type": "bar",
-		"colors": ["#FF6B6B"],
+		"type": "axis-mixed",
+		"colors": ["#FF6B6B", "#5E64FF"],
 		"barOptions": {"spaceRatio": 0.4},
 		"valuesOverPoints": True,
-		"fieldtype": "Int",
-		"yAxis": [
-			{
-				"title": _("Breakdown Count"),
-			}
-		],
-		"title": _("Total Breakdowns: {0}").format(overall_breakdowns),
+		"title": _("{0} Breakdown Trend (Total: {1})").format(_(period), overall_breakdowns),
 	}
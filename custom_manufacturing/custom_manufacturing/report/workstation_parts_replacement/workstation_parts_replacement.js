@@ -6,12 +6,39 @@ frappe.query_reports["Workstation Parts Replacement"] = {
             fieldtype: "Link",
             options: "Plant Floor",
         },
+        {
+            fieldname: "lookback_days",
+            label: __("Consumption Lookback (Days)"),
+            fieldtype: "Int",
+            default: 30,
+        },
+        {
+            fieldname: "order_by",
+            label: __("Sort By"),
+            fieldtype: "Select",
+            options: ["Urgency", "Remaining Qty", "Workstation"],
+            default: "Urgency",
+        },
+        {
+            fieldname: "page",
+            label: __("Page"),
+            fieldtype: "Int",
+            default: 1,
+        },
+        {
+            fieldname: "page_length",
+            label: __("Rows Per Page"),
+            fieldtype: "Int",
+            default: 100,
+        },
     ],
 
     formatter(value, row, column, data, default_formatter) {
         if (column.fieldname === "status" && value === __("Parts Replacement Required")) {
             value = `<span class="label label-danger">${value}</span>`;
+        } else if (column.fieldname === "status" && value === __("Replacement Due Soon")) {
+            value = `<span class="label label-warning">${value}</span>`;
         }
         return default_formatter(value, row, column, data);
     },
-}; 
+};
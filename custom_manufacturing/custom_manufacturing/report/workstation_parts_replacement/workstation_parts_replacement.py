@@ -1,16 +1,54 @@
 from __future__ import annotations
 
-from collections.abc import Iterable
+from math import ceil
 
 import frappe
 from frappe import _
+from frappe.utils import add_days, cint, flt, today
+
+from custom_manufacturing.utils.report_cache import get_table_watermark, run_cached
+
+DEFAULT_LOOKBACK_DAYS = 30
+DEFAULT_PAGE_LENGTH = 100
+MAX_PAGE_LENGTH = 1000
+
+ORDER_BY = {
+    "Urgency": "days_remaining IS NULL, days_remaining, remaining_qty, ws.name",
+    "Remaining Qty": "remaining_qty, ws.name",
+    "Workstation": "ws.plant_floor, ws.name",
+}
 
 
 def execute(filters: dict | None = None):
     filters = frappe._dict(filters or {})
-    columns = get_columns()
-    data = get_data(filters)
-    return columns, data
+    return run_cached(
+        "Workstation Parts Replacement",
+        filters,
+        get_watermark(filters),
+        lambda: (get_columns(), get_data(filters)),
+    )
+
+
+def get_watermark(filters: frappe._dict) -> tuple:
+    # custom_worked_hours is bumped with update_modified=False, so sum it as well
+    where_clause = "plant_floor = %(plant)s" if filters.plant else "1 = 1"
+    return (
+        get_lookback_start(filters),
+        get_table_watermark(
+            "Workstation",
+            where_clause,
+            {"plant": filters.plant},
+            "SUM(custom_worked_hours), SUM(custom_working_hours_before_replacement)",
+        ),
+    )
+
+
+def get_lookback_start(filters: frappe._dict) -> str:
+    return add_days(today(), -get_lookback_days(filters))
+
+
+def get_lookback_days(filters: frappe._dict) -> int:
+    return max(cint(filters.lookback_days) or DEFAULT_LOOKBACK_DAYS, 1)
 
 
 def get_columns() -> list[dict]:
@@ -20,30 +58,68 @@ def get_columns() -> list[dict]:
         {"label": _("Qty Before Replacement"), "fieldname": "threshold_qty", "fieldtype": "Float", "width": 170},
         {"label": _("Completed Qty"), "fieldname": "completed_qty", "fieldtype": "Float", "width": 140},
         {"label": _("Remaining Qty"), "fieldname": "remaining_qty", "fieldtype": "Float", "width": 140},
+        {"label": _("Daily Consumption"), "fieldname": "daily_rate", "fieldtype": "Float", "width": 150},
+        {"label": _("Days Remaining"), "fieldname": "days_remaining", "fieldtype": "Float", "precision": 1, "width": 140},
+        {"label": _("Expected Replacement"), "fieldname": "expected_date", "fieldtype": "Date", "width": 170},
         {"label": _("Status"), "fieldname": "status", "fieldtype": "Data", "width": 180},
     ]
 
 
 def get_data(filters: frappe._dict) -> list[dict]:
+    """Project each workstation's replacement date from its recent Job Card throughput.
+
+    The rate, remaining qty and days remaining are computed in one grouped query so
+    urgency ordering and pagination happen in the database.
+    """
     conditions: list[str] = []
-    values: dict[str, object] = {}
+    lookback_days = get_lookback_days(filters)
+    page_length = min(max(cint(filters.page_length or DEFAULT_PAGE_LENGTH), 1), MAX_PAGE_LENGTH)
+    values: dict[str, object] = {
+        "from_date": get_lookback_start(filters),
+        "lookback_days": lookback_days,
+        "limit": page_length,
+        "offset": (max(cint(filters.page), 1) - 1) * page_length,
+    }
 
     if filters.plant:
-        conditions.append("plant_floor = %(plant)s")
+        conditions.append("ws.plant_floor = %(plant)s")
         values["plant"] = filters.plant
 
     where_clause = f"WHERE {' and '.join(conditions)}" if conditions else ""
+    order_by = ORDER_BY.get(filters.order_by) or ORDER_BY["Urgency"]
 
     rows = frappe.db.sql(
         f"""
         SELECT
-            name,
-            plant_floor,
-            IFNULL(custom_working_hours_before_replacement, 0) AS threshold_qty,
-            IFNULL(custom_worked_hours, 0) AS completed_qty
-        FROM `tabWorkstation`
-        {where_clause}
-        ORDER BY plant_floor, name
+            ws.*,
+            CASE
+                WHEN ws.threshold_qty <= 0 THEN NULL
+                WHEN ws.remaining_qty <= 0 THEN 0
+                WHEN ws.daily_rate > 0 THEN ws.remaining_qty / ws.daily_rate
+            END AS days_remaining
+        FROM (
+            SELECT
+                ws.name,
+                ws.plant_floor,
+                IFNULL(ws.custom_working_hours_before_replacement, 0) AS threshold_qty,
+                IFNULL(ws.custom_worked_hours, 0) AS completed_qty,
+                IF(
+                    IFNULL(ws.custom_working_hours_before_replacement, 0) > 0,
+                    ws.custom_working_hours_before_replacement - IFNULL(ws.custom_worked_hours, 0),
+                    0
+                ) AS remaining_qty,
+                IFNULL(consumption.qty, 0) / %(lookback_days)s AS daily_rate
+            FROM `tabWorkstation` ws
+            LEFT JOIN (
+                SELECT workstation, SUM(total_completed_qty) AS qty
+                FROM `tabJob Card`
+                WHERE docstatus = 1 AND posting_date >= %(from_date)s
+                GROUP BY workstation
+            ) consumption ON consumption.workstation = ws.name
+            {where_clause}
+        ) ws
+        ORDER BY {order_by}
+        LIMIT %(limit)s OFFSET %(offset)s
         """,
         values,
         as_dict=True,
@@ -51,13 +127,15 @@ def get_data(filters: frappe._dict) -> list[dict]:
 
     data: list[dict] = []
     for row in rows:
-        threshold_qty = float(row.threshold_qty or 0)
-        completed_qty = float(row.completed_qty or 0)
+        threshold_qty = flt(row.threshold_qty)
+        completed_qty = flt(row.completed_qty)
+        days_remaining = None if row.days_remaining is None else flt(row.days_remaining)
 
-        remaining_qty = threshold_qty - completed_qty if threshold_qty else 0.0
         status = _("Within Limit")
         if threshold_qty and completed_qty >= threshold_qty:
             status = _("Parts Replacement Required")
+        elif days_remaining is not None and days_remaining <= lookback_days:
+            status = _("Replacement Due Soon")
 
         data.append(
             {
@@ -65,7 +143,10 @@ def get_data(filters: frappe._dict) -> list[dict]:
                 "plant_floor": row.plant_floor,
                 "threshold_qty": threshold_qty,
                 "completed_qty": completed_qty,
-                "remaining_qty": remaining_qty,
+                "remaining_qty": flt(row.remaining_qty),
+                "daily_rate": flt(row.daily_rate),
+                "days_remaining": days_remaining,
+                "expected_date": None if days_remaining is None else add_days(today(), ceil(days_remaining)),
                 "status": status,
             }
         )
@@ -10,6 +10,8 @@ import frappe
 from frappe.model.document import Document
 from frappe.utils import flt, getdate, get_time, today
 
+from custom_manufacturing.utils import breakdown_events, production_counter, production_rollup
+
 
 NUMERIC_FIELD_TYPES: set[str] = {"Float", "Currency", "Int", "Percent"}
 
@@ -119,14 +121,35 @@ def clear_glr_time_defaults(doc: Document, _method: str | None = None) -> None:
 			doc.set(fieldname, None)
 
 
+def on_update(doc: Document, _method: str | None = None) -> None:
+    # runs before on_submit too, so submits are synced here once
+    if doc.get("custom_breakdown_type") and doc.get("workstation"):
+        breakdown_events.sync_job_card(doc)
+        return
+
+    # only a card that was a breakdown before can have an event to drop
+    previous = doc.get_doc_before_save()
+    if previous and previous.get("custom_breakdown_type"):
+        breakdown_events.remove_job_card(doc.name)
+
+
 def on_submit(doc: Document, _method: str | None = None) -> None:
     delta = flt(getattr(doc, "total_completed_qty", 0))
     _update_workstation_hours(doc, delta)
+    production_rollup.apply_job_card(doc, 1)
+    production_counter.apply_job_card(doc, 1)
 
 
 def on_cancel(doc: Document, _method: str | None = None) -> None:
     delta = -flt(getattr(doc, "total_completed_qty", 0))
     _update_workstation_hours(doc, delta)
+    production_rollup.apply_job_card(doc, -1)
+    production_counter.apply_job_card(doc, -1)
+    breakdown_events.sync_job_card(doc)
+
+
+def on_trash(doc: Document, _method: str | None = None) -> None:
+    breakdown_events.remove_job_card(doc.name)
 
 
 def _get_weight_total(doc: Document) -> float:
@@ -0,0 +1,10 @@
+"""Shift document event handlers."""
+
+from __future__ import annotations
+
+from custom_manufacturing.utils.shift import clear_shift_cache
+
+
+def on_change(doc, _method: str | None = None, *args) -> None:
+	"""Drop the cached shift → report column mapping whenever the Shift master changes."""
+	clear_shift_cache()
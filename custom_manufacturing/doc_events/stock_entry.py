@@ -0,0 +1,13 @@
+"""Stock Entry document event handlers."""
+
+from __future__ import annotations
+
+from custom_manufacturing.utils import work_order_batch
+
+
+def on_submit(doc, _method: str | None = None) -> None:
+	work_order_batch.sync_stock_entry(doc)
+
+
+def on_cancel(doc, _method: str | None = None) -> None:
+	work_order_batch.remove_stock_entry(doc.name)
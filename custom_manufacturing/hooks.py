@@ -56,8 +56,16 @@ override_doctype_class = {
 }
 scheduler_events = {
     "daily": [
-        "custom_manufacturing.scheduler.job_card_cleanup.delete_old_open_job_cards"
-    ]
+        "custom_manufacturing.scheduler.job_card_cleanup.delete_old_open_job_cards",
+        "custom_manufacturing.scheduler.rollups.reconcile_rollups",
+        "custom_manufacturing.utils.lead_status.recompute_incremental",
+    ],
+    "daily_long": [
+        "custom_manufacturing.utils.archive.archive_job_cards",
+    ],
+    "weekly_long": [
+        "custom_manufacturing.scheduler.orphan_sweeper.sweep_orphaned_child_rows",
+    ],
 }
 
 # include js, css files in header of web template
@@ -173,12 +181,24 @@ doc_events = {
     "Job Card": {
         "before_insert": "custom_manufacturing.doc_events.job_card.clear_glr_time_defaults",
         "before_save": "custom_manufacturing.doc_events.job_card.sync_weight_totals",
+        "on_update": "custom_manufacturing.doc_events.job_card.on_update",
+        "on_update_after_submit": "custom_manufacturing.doc_events.job_card.on_update",
         "on_submit": "custom_manufacturing.doc_events.job_card.on_submit",
         "on_cancel": "custom_manufacturing.doc_events.job_card.on_cancel",
+        "on_trash": "custom_manufacturing.doc_events.job_card.on_trash",
     },
     "Work Order": {
         "on_submit": "custom_manufacturing.doc_events.work_order.on_submit",
     },
+    "Stock Entry": {
+        "on_submit": "custom_manufacturing.doc_events.stock_entry.on_submit",
+        "on_cancel": "custom_manufacturing.doc_events.stock_entry.on_cancel",
+    },
+    "Shift": {
+        "on_update": "custom_manufacturing.doc_events.shift.on_change",
+        "on_trash": "custom_manufacturing.doc_events.shift.on_change",
+        "after_rename": "custom_manufacturing.doc_events.shift.on_change",
+    },
     "Machine Maintenance": {
         "on_update": "custom_manufacturing.doc_events.machine_maintenance.on_update",
         "on_cancel": "custom_manufacturing.doc_events.machine_maintenance.on_cancel",
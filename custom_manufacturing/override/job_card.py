@@ -14,6 +14,7 @@ from frappe.utils import (
 	add_days,
 	add_to_date,
 	cint,
+	cstr,
 	flt,
 	get_datetime,
 	get_link_to_form,
@@ -29,6 +30,8 @@ from erpnext.manufacturing.doctype.manufacturing_settings.manufacturing_settings
 )
 from erpnext.manufacturing.doctype.workstation_type.workstation_type import get_workstations
 
+from custom_manufacturing.utils import workstation_status
+
 
 class OverlapError(frappe.ValidationError):
 	pass
@@ -557,6 +560,11 @@ class JobCard(Document):
 			)
 
 	def add_time_log(self, args):
+		self.apply_time_log(args)
+		self.save()
+
+	def apply_time_log(self, args):
+		"""Apply one timer event to the time logs without saving."""
 		last_row = []
 		employees = args.employees
 		if isinstance(employees, str):
@@ -598,8 +606,6 @@ class JobCard(Document):
 		if self.status == "On Hold":
 			self.current_time = time_diff_in_seconds(last_row.to_time, last_row.from_time)
 
-		self.save()
-
 	def add_start_time_log(self, args):
 		self.append("time_logs", args)
 
@@ -681,7 +687,10 @@ class JobCard(Document):
 		if not self.get("work_order"):
 			return
 
-		doc = frappe.get_doc("Work Order", self.get("work_order"))
+		self.add_required_items(frappe.get_doc("Work Order", self.get("work_order")))
+
+	def add_required_items(self, doc):
+		"""Append the Work Order's raw materials for this operation, scaled to the Job Card qty."""
 		if doc.transfer_material_against == "Work Order" or doc.skip_transfer:
 			return
 
@@ -699,7 +708,7 @@ class JobCard(Document):
 					{
 						"item_code": d.item_code,
 						"source_warehouse": d.source_warehouse,
-						"uom": frappe.db.get_value("Item", d.item_code, "stock_uom"),
+						"uom": frappe.get_cached_value("Item", d.item_code, "stock_uom"),
 						"item_name": d.item_name,
 						"description": d.description,
 						"required_qty": (d.required_qty * flt(self.for_quantity)) / doc.qty,
@@ -1130,6 +1139,7 @@ class JobCard(Document):
 			return
 
 		frappe.db.set_value("Workstation", self.workstation, "status", status)
+		workstation_status.update_from_job_card(self, status)
 
 
 @frappe.whitelist()
@@ -1143,6 +1153,72 @@ def make_time_log(args):
 	doc.add_time_log(args)
 
 
+@frappe.whitelist(methods=["POST"])
+def make_time_logs(events):
+	"""Apply a backlog of timer events for many Job Cards.
+
+	Events are grouped per Job Card and applied in the order received; each card is
+	validated and saved once and committed on its own. Returns one result per event,
+	in input order. An event that fails to apply marks the card's later events as
+	skipped, since they depend on it.
+	"""
+	if isinstance(events, str):
+		events = json.loads(events)
+
+	results = [
+		{"idx": idx, "job_card_id": (event or {}).get("job_card_id"), "status": "Skipped", "error": None}
+		for idx, event in enumerate(events)
+	]
+
+	events_by_card = {}
+	for idx, event in enumerate(events):
+		event = frappe._dict(event or {})
+		if not event.job_card_id:
+			results[idx].update(status="Failed", error=_("Job Card is required"))
+			continue
+		events_by_card.setdefault(event.job_card_id, []).append((idx, event))
+
+	for job_card, card_events in events_by_card.items():
+		events_by_idx = dict(card_events)
+		applied = []
+		try:
+			doc = frappe.get_doc("Job Card", job_card)
+			doc.validate_sequence_id()
+
+			for idx, event in card_events:
+				try:
+					doc.apply_time_log(event)
+				except Exception as e:
+					results[idx].update(status="Failed", error=_get_error_message(e))
+					# Drop whatever the failed event changed before raising
+					doc = frappe.get_doc("Job Card", job_card)
+					for applied_idx in applied:
+						doc.apply_time_log(events_by_idx[applied_idx])
+					break
+				applied.append(idx)
+
+			if applied:
+				doc.save()
+				frappe.db.commit()
+		except Exception as e:
+			frappe.db.rollback()
+			error = _get_error_message(e)
+			for idx, _event in card_events:
+				if results[idx]["status"] == "Skipped":
+					results[idx].update(status="Failed", error=error)
+			continue
+
+		for idx in applied:
+			results[idx]["status"] = "Success"
+
+	return results
+
+
+def _get_error_message(e):
+	frappe.clear_messages()
+	return cstr(e) or e.__class__.__name__
+
+
 @frappe.whitelist()
 def get_operation_details(work_order, operation):
 	if work_order and operation:
@@ -2,13 +2,14 @@
 # License: GNU General Public License v3. See license.txt
 
 import json
+from itertools import islice
 
 import frappe
 from dateutil.relativedelta import relativedelta
 from frappe import _
 from frappe.model.document import Document
 from frappe.model.mapper import get_mapped_doc
-from frappe.query_builder import Case
+from frappe.query_builder import Case, Tuple
 from frappe.query_builder.functions import Sum
 from frappe.utils import (
 	cint,
@@ -21,23 +22,28 @@ from frappe.utils import (
 	nowdate,
 	time_diff_in_hours,
 )
+from frappe.utils.caching import request_cache
 from pypika import functions as fn
 
 from erpnext.manufacturing.doctype.bom.bom import (
 	get_bom_item_rate,
-	get_bom_items_as_dict,
 	validate_bom_no,
 )
 from erpnext.manufacturing.doctype.manufacturing_settings.manufacturing_settings import (
 	get_mins_between_operations,
 )
-from erpnext.stock.doctype.batch.batch import make_batch
 from erpnext.stock.doctype.item.item import get_item_defaults, validate_end_of_life
 from erpnext.stock.doctype.serial_no.serial_no import get_available_serial_nos, get_serial_nos
 from erpnext.stock.stock_balance import get_planned_qty, update_bin_qty
 from erpnext.stock.utils import get_bin, get_latest_stock_qty, validate_warehouse_company
 from erpnext.utilities.transaction_base import validate_uom_is_integer
 
+from custom_manufacturing.utils import bom_cache, breakdown_events, bulk_delete, deferred_updates
+from custom_manufacturing.utils.batch import make_batches
+from custom_manufacturing.utils.bulk_update import bulk_update
+
+SERIAL_NO_CHUNK_SIZE = 1000
+
 
 class OverProductionError(frappe.ValidationError):
 	pass
@@ -222,45 +228,16 @@ class WorkOrder(Document):
 	def validate_sales_order(self):
 		if self.sales_order:
 			self.check_sales_order_on_hold_or_close()
-			so = frappe.db.sql(
-				"""
-				select so.name, so_item.delivery_date, so.project
-				from `tabSales Order` so
-				inner join `tabSales Order Item` so_item on so_item.parent = so.name
-				left join `tabProduct Bundle Item` pk_item on so_item.item_code = pk_item.parent
-				where so.name=%s and so.docstatus = 1
-					and so.skip_delivery_note  = 0 and (
-					so_item.item_code=%s or
-					pk_item.item_code=%s )
-			""",
-				(self.sales_order, self.production_item, self.production_item),
-				as_dict=1,
-			)
-
-			if not so:
-				so = frappe.db.sql(
-					"""
-					select
-						so.name, so_item.delivery_date, so.project
-					from
-						`tabSales Order` so, `tabSales Order Item` so_item, `tabPacked Item` packed_item
-					where so.name=%s
-						and so.name=so_item.parent
-						and so.name=packed_item.parent
-						and so.skip_delivery_note = 0
-						and so_item.item_code = packed_item.parent_item
-						and so.docstatus = 1 and packed_item.item_code=%s
-				""",
-					(self.sales_order, self.production_item),
-					as_dict=1,
-				)
+			so = get_sales_order_details(self.sales_order, self.production_item)
 
-			if len(so):
+			if so.docstatus == 1 and not so.skip_delivery_note and (so.has_item or so.has_packed_item):
 				if not self.expected_delivery_date:
-					self.expected_delivery_date = so[0].delivery_date
+					self.expected_delivery_date = (
+						so.item_delivery_date if so.has_item else so.packed_delivery_date
+					)
 
-				if so[0].project:
-					self.project = so[0].project
+				if so.project:
+					self.project = so.project
 
 				if not self.material_request:
 					self.validate_work_order_against_so()
@@ -268,7 +245,7 @@ class WorkOrder(Document):
 				frappe.throw(_("Sales Order {0} is not valid").format(self.sales_order))
 
 	def check_sales_order_on_hold_or_close(self):
-		status = frappe.db.get_value("Sales Order", self.sales_order, "status")
+		status = get_sales_order_details(self.sales_order, self.production_item).status
 		if status in ("Closed", "On Hold"):
 			frappe.throw(_("Sales Order {0} is {1}").format(self.sales_order, status))
 
@@ -313,7 +290,7 @@ class WorkOrder(Document):
 		)
 
 	def validate_work_order_against_so(self):
-		# already ordered qty
+		# already ordered qty, read fresh as other Work Orders may have changed it in this request
 		ordered_qty_against_so = frappe.db.sql(
 			"""select sum(qty) from `tabWork Order`
 			where production_item = %s and sales_order = %s and docstatus < 2 and name != %s""",
@@ -322,20 +299,10 @@ class WorkOrder(Document):
 
 		total_qty = flt(ordered_qty_against_so) + flt(self.qty)
 
-		# get qty from Sales Order Item table
-		so_item_qty = frappe.db.sql(
-			"""select sum(stock_qty) from `tabSales Order Item`
-			where parent = %s and item_code = %s""",
-			(self.sales_order, self.production_item),
-		)[0][0]
-		# get qty from Packing Item table
-		dnpi_qty = frappe.db.sql(
-			"""select sum(qty) from `tabPacked Item`
-			where parent = %s and parenttype = 'Sales Order' and item_code = %s""",
-			(self.sales_order, self.production_item),
-		)[0][0]
-		# total qty in SO
-		so_qty = flt(so_item_qty) + flt(dnpi_qty)
+		so = get_sales_order_details(self.sales_order, self.production_item)
+
+		# total qty in SO, from the Sales Order Item and Packing Item tables
+		so_qty = flt(so.so_item_qty) + flt(so.packed_qty)
 
 		allowance_percentage = flt(
 			frappe.db.get_single_value("Manufacturing Settings", "overproduction_percentage_for_sales_order")
@@ -538,13 +505,14 @@ class WorkOrder(Document):
 		):
 			return
 
+		batches = None
 		if self.has_batch_no:
-			self.create_batch_for_finished_good()
+			batches = self.create_batch_for_finished_good()
 
 		args = {"item_code": self.production_item, "work_order": self.name}
 
 		if self.has_serial_no:
-			self.make_serial_nos(args)
+			self.make_serial_nos(args, batches)
 
 	def create_batch_for_finished_good(self):
 		total_qty = self.qty
@@ -560,8 +528,9 @@ class WorkOrder(Document):
 				alert=True,
 				indicator="orange",
 			)
-			return
+			return []
 
+		quantities = []
 		while total_qty > 0:
 			qty = self.batch_size
 			if self.batch_size >= total_qty:
@@ -573,42 +542,32 @@ class WorkOrder(Document):
 				qty = total_qty
 				total_qty = 0
 
-			make_batch(
-				frappe._dict(
-					{
-						"item": self.production_item,
-						"qty_to_produce": qty,
-						"reference_doctype": self.doctype,
-						"reference_name": self.name,
-					}
-				)
-			)
+			quantities.append(qty)
+
+		return make_batches(self.production_item, quantities, self.doctype, self.name)
 
 	def delete_auto_created_batch_and_serial_no(self):
-		for row in frappe.get_all("Serial No", filters={"work_order": self.name}):
-			frappe.delete_doc("Serial No", row.name)
+		# serial nos link to the batches, so they have to go first
+		serial_nos = frappe.get_all("Serial No", {"work_order": self.name}, pluck="name")
+		validate_serial_nos_not_in_stock_ledger(self.production_item, serial_nos)
+		bulk_delete.delete_docs("Serial No", serial_nos)
 
-		for row in frappe.get_all("Batch", filters={"reference_name": self.name}):
-			frappe.delete_doc("Batch", row.name)
+		batches = frappe.get_all("Batch", {"reference_name": self.name}, pluck="name")
+		bulk_delete.delete_docs("Batch", batches)
 
-	def make_serial_nos(self, args):
+	def make_serial_nos(self, args, batches=None):
 		item_details = frappe.get_cached_value(
 			"Item", self.production_item, ["serial_no_series", "item_name", "description"], as_dict=1
 		)
 
-		batches = []
-		if self.has_batch_no:
+		if not item_details.serial_no_series:
+			return
+
+		if batches is None and self.has_batch_no:
 			batches = frappe.get_all(
 				"Batch", filters={"reference_name": self.name}, order_by="creation", pluck="name"
 			)
 
-		serial_nos = []
-		if item_details.serial_no_series:
-			serial_nos = get_available_serial_nos(item_details.serial_no_series, self.qty)
-
-		if not serial_nos:
-			return
-
 		fields = [
 			"name",
 			"serial_no",
@@ -625,36 +584,41 @@ class WorkOrder(Document):
 			"batch_no",
 		]
 
-		serial_nos_details = []
-		index = 0
-		for serial_no in serial_nos:
-			index += 1
-			batch_no = None
-			if batches and self.batch_size:
-				batch_no = batches[0]
-
-				if index % self.batch_size == 0:
-					batches.remove(batch_no)
-
-			serial_nos_details.append(
-				(
-					serial_no,
-					serial_no,
-					now(),
-					now(),
-					frappe.session.user,
-					frappe.session.user,
-					self.company,
-					self.production_item,
-					item_details.item_name,
-					item_details.description,
-					"Inactive",
-					self.name,
-					batch_no,
-				)
+		timestamp = now()
+		user = frappe.session.user
+		batch_size = flt(self.batch_size)
+
+		def _get_batch_no(position):
+			# each batch takes batch_size consecutive serial nos; later ones get none
+			if not (batches and batch_size):
+				return None
+
+			batch_idx = int(position // batch_size)
+			return batches[batch_idx] if batch_idx < len(batches) else None
+
+		serial_nos_details = (
+			(
+				serial_no,
+				serial_no,
+				timestamp,
+				timestamp,
+				user,
+				user,
+				self.company,
+				self.production_item,
+				item_details.item_name,
+				item_details.description,
+				"Inactive",
+				self.name,
+				_get_batch_no(position),
 			)
+			for position, serial_no in enumerate(
+				_iter_available_serial_nos(item_details.serial_no_series, self.qty)
+			)
+		)
 
-		frappe.db.bulk_insert("Serial No", fields=fields, values=set(serial_nos_details))
+		while chunk := list(islice(serial_nos_details, SERIAL_NO_CHUNK_SIZE)):
+			frappe.db.bulk_insert("Serial No", fields=fields, values=chunk)
 
 	def create_job_card(self):
 		"""Suppress automatic Job Card creation; users can still create them manually."""
@@ -732,26 +696,17 @@ class WorkOrder(Document):
 			)
 
 	def update_planned_qty(self):
-		from erpnext.manufacturing.doctype.production_plan.production_plan import (
-			get_reserved_qty_for_sub_assembly,
-		)
-
-		qty_dict = {"planned_qty": get_planned_qty(self.production_item, self.fg_warehouse)}
+		deferred_updates.enqueue(update_planned_qty_in_bins, (self.production_item, self.fg_warehouse))
 
 		if self.production_plan_sub_assembly_item and self.production_plan:
-			qty_dict["reserved_qty_for_production_plan"] = get_reserved_qty_for_sub_assembly(
-				self.production_item, self.fg_warehouse
+			deferred_updates.enqueue(
+				update_reserved_qty_for_sub_assembly_in_bins, (self.production_item, self.fg_warehouse)
 			)
 
-		update_bin_qty(
-			self.production_item,
-			self.fg_warehouse,
-			qty_dict,
-		)
-
 		if self.material_request:
-			mr_obj = frappe.get_doc("Material Request", self.material_request)
-			mr_obj.update_requested_qty([self.material_request_item])
+			deferred_updates.enqueue(
+				update_requested_qty_in_material_requests, (self.material_request, self.material_request_item)
+			)
 
 	def set_produced_qty_for_sub_assembly_item(self):
 		table = frappe.qb.DocType("Work Order")
@@ -777,151 +732,46 @@ class WorkOrder(Document):
 
 	def update_ordered_qty(self):
 		if self.production_plan and (self.production_plan_item or self.production_plan_sub_assembly_item):
-			table = frappe.qb.DocType("Work Order")
-
-			query = (
-				frappe.qb.from_(table)
-				.select(Sum(table.qty))
-				.where((table.production_plan == self.production_plan) & (table.docstatus == 1))
-			)
-
-			if self.production_plan_item:
-				query = query.where(table.production_plan_item == self.production_plan_item)
-			elif self.production_plan_sub_assembly_item:
-				query = query.where(
-					table.production_plan_sub_assembly_item == self.production_plan_sub_assembly_item
-				)
-
-			query = query.run()
-			qty = flt(query[0][0]) if query else 0
-
 			if self.production_plan_item:
-				frappe.db.set_value("Production Plan Item", self.production_plan_item, "ordered_qty", qty)
-			elif self.production_plan_sub_assembly_item:
-				frappe.db.set_value(
+				key = (self.production_plan, "Production Plan Item", self.production_plan_item)
+			else:
+				key = (
+					self.production_plan,
 					"Production Plan Sub Assembly Item",
 					self.production_plan_sub_assembly_item,
-					"ordered_qty",
-					qty,
 				)
 
-			doc = frappe.get_doc("Production Plan", self.production_plan)
-			doc.set_status()
-			doc.db_set("status", doc.status)
+			deferred_updates.enqueue(update_ordered_qty_in_production_plans, key)
 
 	def update_work_order_qty_in_so(self):
 		if not self.sales_order and not self.sales_order_item:
 			return
 
-		total_bundle_qty = 1
-		if self.product_bundle_item:
-			total_bundle_qty = frappe.db.sql(
-				""" select sum(qty) from
-				`tabProduct Bundle Item` where parent = %s""",
-				(frappe.db.escape(self.product_bundle_item)),
-			)[0][0]
-
-			if not total_bundle_qty:
-				# product bundle is 0 (product bundle allows 0 qty for items)
-				total_bundle_qty = 1
-
-		cond = "product_bundle_item = %s" if self.product_bundle_item else "production_item = %s"
-
-		qty = frappe.db.sql(
-			f""" select sum(qty) from
-			`tabWork Order` where sales_order = %s and docstatus = 1 and {cond}
-			""",
-			(self.sales_order, (self.product_bundle_item or self.production_item)),
-			as_list=1,
-		)
-
-		work_order_qty = qty[0][0] if qty and qty[0][0] else 0
-		frappe.db.set_value(
-			"Sales Order Item",
-			self.sales_order_item,
-			"work_order_qty",
-			flt(work_order_qty / total_bundle_qty, 2),
+		deferred_updates.enqueue(
+			update_work_order_qty_in_sales_orders,
+			(self.sales_order, self.sales_order_item, self.product_bundle_item, self.production_item),
 		)
 
 	def update_work_order_qty_in_combined_so(self):
-		total_bundle_qty = 1
-		if self.product_bundle_item:
-			total_bundle_qty = frappe.db.sql(
-				""" select sum(qty) from
-				`tabProduct Bundle Item` where parent = %s""",
-				(frappe.db.escape(self.product_bundle_item)),
-			)[0][0]
-
-			if not total_bundle_qty:
-				# product bundle is 0 (product bundle allows 0 qty for items)
-				total_bundle_qty = 1
-
-		prod_plan = frappe.get_doc("Production Plan", self.production_plan)
-		item_reference = frappe.get_value(
-			"Production Plan Item", self.production_plan_item, "sales_order_item"
+		deferred_updates.enqueue(
+			update_work_order_qty_in_combined_sales_orders,
+			(self.production_plan, self.production_plan_item, self.product_bundle_item),
 		)
 
-		for plan_reference in prod_plan.prod_plan_references:
-			work_order_qty = 0.0
-			if plan_reference.item_reference == item_reference:
-				if self.docstatus == 1:
-					work_order_qty = flt(plan_reference.qty) / total_bundle_qty
-				frappe.db.set_value(
-					"Sales Order Item", plan_reference.sales_order_item, "work_order_qty", work_order_qty
-				)
-
 	def update_completed_qty_in_material_request(self):
 		if self.material_request and self.material_request_item:
-			frappe.get_doc("Material Request", self.material_request).update_completed_qty(
-				[self.material_request_item]
+			deferred_updates.enqueue(
+				update_completed_qty_in_material_requests, (self.material_request, self.material_request_item)
 			)
 
 	def set_work_order_operations(self):
 		"""Fetch operations from BOM and set in 'Work Order'"""
 
-		def _get_operations(bom_no, qty=1):
-			data = frappe.get_all(
-				"BOM Operation",
-				filters={"parent": bom_no},
-				fields=[
-					"operation",
-					"description",
-					"workstation",
-					"idx",
-					"workstation_type",
-					"base_hour_rate as hour_rate",
-					"time_in_mins",
-					"parent as bom",
-					"batch_size",
-					"sequence_id",
-					"fixed_time",
-				],
-				order_by="idx",
-			)
-
-			for d in data:
-				if not d.fixed_time:
-					d.time_in_mins = flt(d.time_in_mins) * flt(qty)
-				d.status = "Pending"
-
-			return data
-
 		self.set("operations", [])
 		if not self.bom_no or not frappe.get_cached_value("BOM", self.bom_no, "with_operations"):
 			return
 
-		operations = []
-
-		if self.use_multi_level_bom:
-			bom_tree = frappe.get_doc("BOM", self.bom_no).get_tree_representation()
-			bom_traversal = reversed(bom_tree.level_order_traversal())
-
-			for node in bom_traversal:
-				if node.is_bom:
-					operations.extend(_get_operations(node.name, qty=node.exploded_qty / node.bom_qty))
-
-		bom_qty = frappe.get_cached_value("BOM", self.bom_no, "quantity")
-		operations.extend(_get_operations(self.bom_no, qty=1.0 / bom_qty))
+		operations = bom_cache.get_bom_operations(self.bom_no, multi_level=self.use_multi_level_bom)
 
 		for correct_index, operation in enumerate(operations, start=1):
 			operation.idx = correct_index
@@ -1011,8 +861,10 @@ class WorkOrder(Document):
 			self.lead_time = flt(time_diff_in_hours(self.actual_end_date, self.actual_start_date) * 60)
 
 	def delete_job_card(self):
-		for d in frappe.get_all("Job Card", ["name"], {"work_order": self.name}):
-			frappe.delete_doc("Job Card", d.name)
+		job_cards = frappe.get_all("Job Card", {"work_order": self.name}, pluck="name")
+		bulk_delete.delete_docs("Job Card", job_cards)
+		# the Job Card on_trash hook does not run for bulk deletes
+		breakdown_events.remove_job_cards(job_cards)
 
 	def validate_production_item(self):
 		if frappe.get_cached_value("Item", self.production_item, "has_variants"):
@@ -1095,9 +947,8 @@ class WorkOrder(Document):
 		self.update_consumed_qty_for_required_items()
 
 		if self.docstatus == 1:
-			# calculate transferred qty based on submitted stock entries
-			self.update_transferred_qty_for_required_items()
-			self.update_returned_qty()
+			# calculate transferred and returned qty based on submitted stock entries
+			self.update_transferred_and_returned_qty()
 
 			# update in bin
 			self.update_reserved_qty_for_production()
@@ -1106,8 +957,9 @@ class WorkOrder(Document):
 		"""update reserved_qty_for_production in bins"""
 		for d in self.required_items:
 			if d.source_warehouse:
-				stock_bin = get_bin(d.item_code, d.source_warehouse)
-				stock_bin.update_reserved_qty_for_production()
+				deferred_updates.enqueue(
+					update_reserved_qty_for_production_in_bins, (d.item_code, d.source_warehouse)
+				)
 
 	@frappe.whitelist()
 	def get_items_and_operations_from_bom(self):
@@ -1134,7 +986,7 @@ class WorkOrder(Document):
 			operation = self.operations[0].operation
 
 		if self.bom_no and self.qty:
-			item_dict = get_bom_items_as_dict(
+			item_dict = bom_cache.get_scaled_bom_items(
 				self.bom_no, self.company, qty=self.qty, fetch_exploded=self.use_multi_level_bom
 			)
 
@@ -1169,36 +1021,13 @@ class WorkOrder(Document):
 			self.set_available_qty()
 
 	def update_transferred_qty_for_required_items(self):
-		ste = frappe.qb.DocType("Stock Entry")
-		ste_child = frappe.qb.DocType("Stock Entry Detail")
-
-		query = (
-			frappe.qb.from_(ste)
-			.inner_join(ste_child)
-			.on(ste_child.parent == ste.name)
-			.select(
-				ste_child.item_code,
-				ste_child.original_item,
-				fn.Sum(ste_child.qty).as_("qty"),
-			)
-			.where(
-				(ste.docstatus == 1)
-				& (ste.work_order == self.name)
-				& (ste.purpose == "Material Transfer for Manufacture")
-				& (ste.is_return == 0)
-			)
-			.groupby(ste_child.item_code)
-		)
-
-		data = query.run(as_dict=1) or []
-		transferred_items = frappe._dict({d.original_item or d.item_code: d.qty for d in data})
-
-		for row in self.required_items:
-			row.db_set(
-				"transferred_qty", (transferred_items.get(row.item_code) or 0.0), update_modified=False
-			)
+		self.update_transferred_and_returned_qty()
 
 	def update_returned_qty(self):
+		self.update_transferred_and_returned_qty()
+
+	def update_transferred_and_returned_qty(self):
+		"""Recompute transferred and returned qty of required items from one grouped query."""
 		ste = frappe.qb.DocType("Stock Entry")
 		ste_child = frappe.qb.DocType("Stock Entry Detail")
 
@@ -1209,51 +1038,74 @@ class WorkOrder(Document):
 			.select(
 				ste_child.item_code,
 				ste_child.original_item,
-				fn.Sum(ste_child.qty).as_("qty"),
+				fn.Sum(Case().when(ste.is_return == 0, ste_child.qty)).as_("transferred_qty"),
+				fn.Sum(Case().when(ste.is_return == 1, ste_child.qty)).as_("returned_qty"),
 			)
 			.where(
 				(ste.docstatus == 1)
 				& (ste.work_order == self.name)
 				& (ste.purpose == "Material Transfer for Manufacture")
-				& (ste.is_return == 1)
 			)
 			.groupby(ste_child.item_code)
 		)
 
-		data = query.run(as_dict=1) or []
-		returned_dict = frappe._dict({d.original_item or d.item_code: d.qty for d in data})
+		transferred_items = frappe._dict()
+		returned_dict = frappe._dict()
+		for d in query.run(as_dict=1) or []:
+			# NULL sums mean the group had no rows of that kind
+			if d.transferred_qty is not None:
+				transferred_items[d.original_item or d.item_code] = d.transferred_qty
+			if d.returned_qty is not None:
+				returned_dict[d.original_item or d.item_code] = d.returned_qty
 
+		updates = {}
 		for row in self.required_items:
-			row.db_set("returned_qty", (returned_dict.get(row.item_code) or 0.0), update_modified=False)
+			row.transferred_qty = transferred_items.get(row.item_code) or 0.0
+			row.returned_qty = returned_dict.get(row.item_code) or 0.0
+			updates[row.name] = {"transferred_qty": row.transferred_qty, "returned_qty": row.returned_qty}
+
+		bulk_update("Work Order Item", updates, update_modified=False)
 
 	def update_consumed_qty_for_required_items(self):
 		"""
 		Update consumed qty from submitted stock entries
 		against a work order for each stock item
 		"""
+		consumed = frappe.db.sql(
+			"""
+			SELECT
+				detail.item_code,
+				detail.original_item,
+				SUM(detail.qty) AS qty
+			FROM
+				`tabStock Entry` entry,
+				`tabStock Entry Detail` detail
+			WHERE
+				entry.work_order = %(name)s
+					AND (entry.purpose = "Material Consumption for Manufacture"
+						OR entry.purpose = "Manufacture")
+					AND entry.docstatus = 1
+					AND detail.parent = entry.name
+					AND detail.s_warehouse IS NOT null
+			GROUP BY detail.item_code, detail.original_item
+			""",
+			{"name": self.name},
+			as_dict=True,
+		)
 
+		# A row counts towards both its item and the item it substitutes
+		consumed_qty = {}
+		for row in consumed:
+			consumed_qty[row.item_code] = consumed_qty.get(row.item_code, 0.0) + flt(row.qty)
+			if row.original_item and row.original_item != row.item_code:
+				consumed_qty[row.original_item] = consumed_qty.get(row.original_item, 0.0) + flt(row.qty)
+
+		updates = {}
 		for item in self.required_items:
-			consumed_qty = frappe.db.sql(
-				"""
-				SELECT
-					SUM(detail.qty)
-				FROM
-					`tabStock Entry` entry,
-					`tabStock Entry Detail` detail
-				WHERE
-					entry.work_order = %(name)s
-						AND (entry.purpose = "Material Consumption for Manufacture"
-							OR entry.purpose = "Manufacture")
-						AND entry.docstatus = 1
-						AND detail.parent = entry.name
-						AND detail.s_warehouse IS NOT null
-						AND (detail.item_code = %(item)s
-							OR detail.original_item = %(item)s)
-				""",
-				{"name": self.name, "item": item.item_code},
-			)[0][0]
-
-			item.db_set("consumed_qty", flt(consumed_qty), update_modified=False)
+			item.consumed_qty = flt(consumed_qty.get(item.item_code))
+			updates[item.name] = {"consumed_qty": item.consumed_qty}
+
+		bulk_update("Work Order Item", updates, update_modified=False)
 
 	@frappe.whitelist()
 	def make_bom(self):
@@ -1610,6 +1462,33 @@ def split_qty_based_on_batch_size(wo_doc, row, qty):
 	return qty
 
 
+def validate_serial_nos_not_in_stock_ledger(item_code, serial_nos):
+	"""Bulk form of ``SerialNo.on_trash``: throw if a Stock Ledger Entry still lists any of *serial_nos*.
+
+	Serial and Batch Bundles link Serial Nos directly and are caught by the link check of
+	``bulk_delete.delete_docs``. The legacy ``serial_no`` text column is searched here, one
+	query per chunk, and candidate rows are matched exactly in Python.
+	"""
+	iterator = iter(serial_nos)
+	while chunk := list(islice(iterator, SERIAL_NO_CHUNK_SIZE)):
+		pending = {serial_no.upper(): serial_no for serial_no in chunk}
+		for sle in frappe.db.sql_list(
+			f"""
+			select serial_no from `tabStock Ledger Entry`
+			where item_code = %s and is_cancelled = 0
+				and ({" or ".join(["serial_no like %s"] * len(chunk))})
+			""",
+			(item_code, *(f"%{serial_no}%" for serial_no in chunk)),
+		):
+			for serial_no in get_serial_nos(sle):
+				if serial_no.upper() in pending:
+					frappe.throw(
+						_("Cannot delete Serial No {0}, as it is used in stock transactions").format(
+							pending[serial_no.upper()]
+						)
+					)
+
+
 def get_serial_nos_for_job_card(row, wo_doc):
 	if not wo_doc.has_serial_no:
 		return
@@ -1642,6 +1521,18 @@ def get_serial_nos_for_work_order(work_order, production_item):
 	return serial_nos
 
 
+def _iter_available_serial_nos(serial_no_series, qty):
+	"""Yield new serial nos from the series, reserving them one chunk at a time."""
+	remaining = cint(qty)
+	while remaining > 0:
+		serial_nos = get_available_serial_nos(serial_no_series, min(remaining, SERIAL_NO_CHUNK_SIZE))
+		if not serial_nos:
+			return
+
+		yield from serial_nos
+		remaining -= len(serial_nos)
+
+
 def validate_operation_data(row):
 	qty = flt(row.get("qty"))
 	if qty < 0:
@@ -1698,7 +1589,7 @@ def create_job_card(work_order, row, enable_capacity_planning=False, auto_create
 
     # Fetch required items if needed
     if work_order.transfer_material_against == "Job Card" and not work_order.skip_transfer:
-        doc.get_required_items()
+        doc.add_required_items(work_order)
 
     if auto_create:
         doc.flags.ignore_mandatory = True
@@ -1787,6 +1678,69 @@ def create_pick_list(source_name, target_doc=None, for_qty=None):
 	return doc
 
 
+@request_cache
+def get_sales_order_details(sales_order: str, production_item: str):
+	"""Return what Work Order validation needs from *sales_order* for *production_item* in one query.
+
+	``has_item`` is set when a Sales Order Item is the item or a Product Bundle
+	containing it, ``has_packed_item`` when it is packed into one; the delivery
+	dates only serve as defaults. Cached per request, so Work Orders created
+	together for the same order and item share one lookup.
+	"""
+	details = frappe.db.sql(
+		"""
+		select
+			so.status, so.docstatus, so.skip_delivery_note, so.project,
+			exists(
+				select 1
+				from `tabSales Order Item` so_item
+				left join `tabProduct Bundle Item` pk_item on so_item.item_code = pk_item.parent
+				where so_item.parent = so.name
+					and (so_item.item_code = %(item_code)s or pk_item.item_code = %(item_code)s)
+			) as has_item,
+			exists(
+				select 1
+				from `tabSales Order Item` so_item
+				inner join `tabPacked Item` packed_item
+					on packed_item.parent = so_item.parent and packed_item.parent_item = so_item.item_code
+				where so_item.parent = so.name and packed_item.item_code = %(item_code)s
+			) as has_packed_item,
+			(
+				select so_item.delivery_date
+				from `tabSales Order Item` so_item
+				left join `tabProduct Bundle Item` pk_item on so_item.item_code = pk_item.parent
+				where so_item.parent = so.name
+					and (so_item.item_code = %(item_code)s or pk_item.item_code = %(item_code)s)
+				order by so_item.idx
+				limit 1
+			) as item_delivery_date,
+			(
+				select so_item.delivery_date
+				from `tabSales Order Item` so_item
+				inner join `tabPacked Item` packed_item
+					on packed_item.parent = so_item.parent and packed_item.parent_item = so_item.item_code
+				where so_item.parent = so.name and packed_item.item_code = %(item_code)s
+				order by so_item.idx
+				limit 1
+			) as packed_delivery_date,
+			(
+				select sum(stock_qty) from `tabSales Order Item`
+				where parent = so.name and item_code = %(item_code)s
+			) as so_item_qty,
+			(
+				select sum(qty) from `tabPacked Item`
+				where parent = so.name and parenttype = 'Sales Order' and item_code = %(item_code)s
+			) as packed_qty
+		from `tabSales Order` so
+		where so.name = %(sales_order)s
+		""",
+		{"sales_order": sales_order, "item_code": production_item},
+		as_dict=1,
+	)
+
+	return details[0] if details else frappe._dict()
+
+
 def get_reserved_qty_for_production(
 	item_code: str,
 	warehouse: str,
@@ -1794,6 +1748,45 @@ def get_reserved_qty_for_production(
 	check_production_plan: bool = False,
 ) -> float:
 	"""Get total reserved quantity for any item in specified warehouse"""
+	wo_item = frappe.qb.DocType("Work Order Item")
+	query, qty_field = _get_reserved_qty_query(non_completed_production_plans, check_production_plan)
+	query = query.select(Sum(qty_field)).where(
+		(wo_item.item_code == item_code) & (wo_item.source_warehouse == warehouse)
+	)
+
+	return query.run()[0][0] or 0.0
+
+
+def get_reserved_qty_for_production_batch(
+	item_warehouses: list[tuple[str, str]],
+	non_completed_production_plans: list | None = None,
+	check_production_plan: bool = False,
+) -> dict[tuple[str, str], float]:
+	"""Get reserved quantity for many (item_code, warehouse) pairs with one grouped query.
+
+	Pairs without reservations are returned with 0.0.
+	"""
+	pairs = list(dict.fromkeys(item_warehouses))
+	if not pairs:
+		return {}
+
+	wo_item = frappe.qb.DocType("Work Order Item")
+	query, qty_field = _get_reserved_qty_query(non_completed_production_plans, check_production_plan)
+	query = (
+		query.select(wo_item.item_code, wo_item.source_warehouse, Sum(qty_field))
+		.where(Tuple(wo_item.item_code, wo_item.source_warehouse).isin([Tuple(*pair) for pair in pairs]))
+		.groupby(wo_item.item_code, wo_item.source_warehouse)
+	)
+
+	reserved = dict.fromkeys(pairs, 0.0)
+	for item_code, warehouse, qty in query.run():
+		reserved[(item_code, warehouse)] = qty or 0.0
+
+	return reserved
+
+
+def _get_reserved_qty_query(non_completed_production_plans=None, check_production_plan=False):
+	"""Return the Work Order Item reservation query without its select, and the qty expression."""
 	wo = frappe.qb.DocType("Work Order")
 	wo_item = frappe.qb.DocType("Work Order Item")
 
@@ -1807,13 +1800,7 @@ def get_reserved_qty_for_production(
 	query = (
 		frappe.qb.from_(wo)
 		.from_(wo_item)
-		.select(Sum(qty_field))
-		.where(
-			(wo_item.item_code == item_code)
-			& (wo_item.parent == wo.name)
-			& (wo.docstatus == 1)
-			& (wo_item.source_warehouse == warehouse)
-		)
+		.where((wo_item.parent == wo.name) & (wo.docstatus == 1))
 	)
 
 	if check_production_plan:
@@ -1830,7 +1817,166 @@ def get_reserved_qty_for_production(
 	if non_completed_production_plans:
 		query = query.where(wo.production_plan.isin(non_completed_production_plans))
 
-	return query.run()[0][0] or 0.0
+	return query, qty_field
+
+
+def update_reserved_qty_for_production_in_bins(item_warehouses):
+	"""Deferred handler: refresh reserved_qty_for_production of the given (item_code, warehouse) bins."""
+	for (item_code, warehouse), qty in get_reserved_qty_for_production_batch(item_warehouses).items():
+		# same steps as Bin.update_reserved_qty_for_production, with the qty already fetched
+		stock_bin = get_bin(item_code, warehouse)
+		stock_bin.reserved_qty_for_production = flt(qty, stock_bin.precision("reserved_qty_for_production"))
+		stock_bin.db_set("reserved_qty_for_production", stock_bin.reserved_qty_for_production)
+
+		stock_bin.update_reserved_qty_for_production_plan(skip_project_qty_update=True)
+		stock_bin.set_projected_qty()
+		stock_bin.db_set("projected_qty", stock_bin.projected_qty)
+
+
+def update_planned_qty_in_bins(item_warehouses):
+	"""Deferred handler: refresh planned_qty of the given (item_code, warehouse) bins."""
+	for item_code, warehouse in item_warehouses:
+		update_bin_qty(item_code, warehouse, {"planned_qty": get_planned_qty(item_code, warehouse)})
+
+
+def update_reserved_qty_for_sub_assembly_in_bins(item_warehouses):
+	"""Deferred handler: refresh reserved_qty_for_production_plan of sub-assembly bins."""
+	from erpnext.manufacturing.doctype.production_plan.production_plan import (
+		get_reserved_qty_for_sub_assembly,
+	)
+
+	for item_code, warehouse in item_warehouses:
+		update_bin_qty(
+			item_code,
+			warehouse,
+			{"reserved_qty_for_production_plan": get_reserved_qty_for_sub_assembly(item_code, warehouse)},
+		)
+
+
+def update_ordered_qty_in_production_plans(plan_rows):
+	"""Deferred handler: refresh ordered_qty of (production_plan, row doctype, row name) and the plans' status."""
+	table = frappe.qb.DocType("Work Order")
+	plans = list(dict.fromkeys(plan for plan, _row_doctype, _row in plan_rows))
+
+	for row_doctype, fieldname in (
+		("Production Plan Item", "production_plan_item"),
+		("Production Plan Sub Assembly Item", "production_plan_sub_assembly_item"),
+	):
+		rows = [row for _plan, doctype, row in plan_rows if doctype == row_doctype]
+		if not rows:
+			continue
+
+		ordered_qty = dict(
+			frappe.qb.from_(table)
+			.select(table[fieldname], Sum(table.qty))
+			.where(
+				(table.production_plan.isin(plans)) & (table[fieldname].isin(rows)) & (table.docstatus == 1)
+			)
+			.groupby(table[fieldname])
+			.run()
+		)
+		bulk_update(row_doctype, {row: {"ordered_qty": flt(ordered_qty.get(row))} for row in rows})
+
+	for plan in plans:
+		doc = frappe.get_doc("Production Plan", plan)
+		doc.set_status()
+		doc.db_set("status", doc.status)
+
+
+def update_work_order_qty_in_sales_orders(keys):
+	"""Deferred handler: refresh work_order_qty of the given Sales Order Items."""
+	for sales_order, sales_order_item, product_bundle_item, production_item in keys:
+		total_bundle_qty = get_total_bundle_qty(product_bundle_item)
+
+		cond = "product_bundle_item = %s" if product_bundle_item else "production_item = %s"
+
+		qty = frappe.db.sql(
+			f""" select sum(qty) from
+			`tabWork Order` where sales_order = %s and docstatus = 1 and {cond}
+			""",
+			(sales_order, (product_bundle_item or production_item)),
+			as_list=1,
+		)
+
+		work_order_qty = qty[0][0] if qty and qty[0][0] else 0
+		frappe.db.set_value(
+			"Sales Order Item",
+			sales_order_item,
+			"work_order_qty",
+			flt(work_order_qty / total_bundle_qty, 2),
+		)
+
+
+def update_work_order_qty_in_combined_sales_orders(keys):
+	"""Deferred handler: refresh work_order_qty of Sales Order Items combined in a Production Plan.
+
+	The items carry their share of the plan item while a submitted Work Order exists for it, else 0.
+	"""
+	submitted = {
+		(row.production_plan, row.production_plan_item)
+		for row in frappe.get_all(
+			"Work Order",
+			filters={
+				"production_plan": ("in", list({plan for plan, _item, _bundle in keys})),
+				"production_plan_item": ("in", list({item for _plan, item, _bundle in keys})),
+				"docstatus": 1,
+			},
+			fields=["production_plan", "production_plan_item"],
+		)
+	}
+
+	plans = {}
+	for production_plan, production_plan_item, product_bundle_item in keys:
+		if production_plan not in plans:
+			plans[production_plan] = frappe.get_doc("Production Plan", production_plan)
+
+		total_bundle_qty = get_total_bundle_qty(product_bundle_item)
+		item_reference = frappe.get_value("Production Plan Item", production_plan_item, "sales_order_item")
+
+		for plan_reference in plans[production_plan].prod_plan_references:
+			work_order_qty = 0.0
+			if plan_reference.item_reference == item_reference:
+				if (production_plan, production_plan_item) in submitted:
+					work_order_qty = flt(plan_reference.qty) / total_bundle_qty
+				frappe.db.set_value(
+					"Sales Order Item", plan_reference.sales_order_item, "work_order_qty", work_order_qty
+				)
+
+
+def get_total_bundle_qty(product_bundle_item):
+	total_bundle_qty = 1
+	if product_bundle_item:
+		total_bundle_qty = frappe.db.sql(
+			""" select sum(qty) from
+			`tabProduct Bundle Item` where parent = %s""",
+			(frappe.db.escape(product_bundle_item)),
+		)[0][0]
+
+		if not total_bundle_qty:
+			# product bundle is 0 (product bundle allows 0 qty for items)
+			total_bundle_qty = 1
+
+	return total_bundle_qty
+
+
+def update_requested_qty_in_material_requests(keys):
+	"""Deferred handler: refresh requested qty for (material_request, material_request_item) pairs."""
+	for material_request, items in _group_by_material_request(keys).items():
+		frappe.get_doc("Material Request", material_request).update_requested_qty(items)
+
+
+def update_completed_qty_in_material_requests(keys):
+	"""Deferred handler: refresh completed qty for (material_request, material_request_item) pairs."""
+	for material_request, items in _group_by_material_request(keys).items():
+		frappe.get_doc("Material Request", material_request).update_completed_qty(items)
+
+
+def _group_by_material_request(keys):
+	items = {}
+	for material_request, material_request_item in keys:
+		items.setdefault(material_request, []).append(material_request_item)
+
+	return items
 
 
 @frappe.whitelist()
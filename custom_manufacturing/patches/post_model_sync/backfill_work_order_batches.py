@@ -0,0 +1,7 @@
+"""Populate the Work Order Batch mapping for existing Stock Entries."""
+
+from custom_manufacturing.utils.work_order_batch import backfill
+
+
+def execute():
+	backfill()
@@ -0,0 +1,7 @@
+"""Build Machine Breakdown Events from existing breakdown Job Cards."""
+
+from custom_manufacturing.utils.breakdown_events import rebuild
+
+
+def execute():
+	rebuild()
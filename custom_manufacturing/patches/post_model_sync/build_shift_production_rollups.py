@@ -0,0 +1,7 @@
+"""Build the shift production rollups from existing submitted Job Cards."""
+
+from custom_manufacturing.utils.production_rollup import reconcile
+
+
+def execute():
+	reconcile()
@@ -0,0 +1,7 @@
+"""Seed the work order production counters from existing submitted Job Cards."""
+
+from custom_manufacturing.utils.production_counter import rebuild
+
+
+def execute():
+	rebuild()
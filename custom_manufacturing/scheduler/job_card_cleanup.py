@@ -1,18 +1,57 @@
 import frappe
-from datetime import datetime, timedelta
+from frappe.utils import add_days, cint, today
 
-def delete_old_open_job_cards():
-    target_date = (datetime.today() - timedelta(days=2)).date()
+from custom_manufacturing.utils import breakdown_events
+from custom_manufacturing.utils.bulk_delete import add_counts, count_documents, delete_documents
 
-    query = """
-        DELETE FROM `tabJob Card`
-        WHERE status = 'Open'
-        AND posting_date = %s
+DEFAULT_RETENTION_DAYS = 2
+DEFAULT_BATCH_SIZE = 500
+
+
+def delete_old_open_job_cards(dry_run=False, batch_size=DEFAULT_BATCH_SIZE):
+    """Delete every Open draft Job Card posted on or before the cutoff, with its child rows.
+
+    The cutoff is ``job_card_cleanup_days`` (site config, default 2) days ago, so
+    runs missed by the scheduler are caught up on the next run. Work is done in
+    batches with a commit per batch. With ``dry_run`` only the counts are logged.
     """
+    retention_days = cint(frappe.conf.get("job_card_cleanup_days")) or DEFAULT_RETENTION_DAYS
+    cutoff = add_days(today(), -retention_days)
+    logger = frappe.logger("job_card_cleanup")
 
+    totals = {}
+    last_name = ""
     try:
-        frappe.db.sql(query, (target_date,))
-        frappe.db.commit()
-        frappe.logger().info(f"Deleted Job Cards with status=open and posting_date={target_date}")
+        while True:
+            names = frappe.db.sql_list(
+                """
+                SELECT name
+                FROM `tabJob Card`
+                WHERE status = 'Open'
+                AND docstatus = 0
+                AND posting_date <= %(cutoff)s
+                AND name > %(last_name)s
+                ORDER BY name
+                LIMIT %(batch_size)s
+                """,
+                {"cutoff": cutoff, "last_name": last_name, "batch_size": cint(batch_size)},
+            )
+            if not names:
+                break
+
+            if dry_run:
+                add_counts(totals, count_documents("Job Card", names))
+            else:
+                add_counts(totals, delete_documents("Job Card", names))
+                breakdown_events.remove_job_cards(names)
+                frappe.db.commit()
+
+            last_name = names[-1]
     except Exception as e:
+        frappe.db.rollback()
         frappe.logger().error(f"Job Card deletion failed: {str(e)}")
+        raise
+
+    action = "Would delete" if dry_run else "Deleted"
+    logger.info(f"{action} open Job Cards posted on or before {cutoff}: {totals or 'nothing'}")
+    return totals
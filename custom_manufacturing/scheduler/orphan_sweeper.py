@@ -0,0 +1,86 @@
+"""Weekly removal of child rows whose parent Job Card or Work Order no longer exists."""
+
+from __future__ import annotations
+
+import time
+
+import frappe
+from frappe.utils import cint, flt
+
+from custom_manufacturing.utils.bulk_delete import get_child_doctypes
+
+PARENT_DOCTYPES = ("Job Card", "Work Order")
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_SLEEP_SECONDS = 0.5
+
+
+def sweep_orphaned_child_rows(dry_run: bool = False) -> dict[str, int]:
+	"""Delete orphaned child rows of every Job Card and Work Order table field.
+
+	Each child table is scanned in keyset windows of ``orphan_sweep_chunk_size``
+	rows, anti-joined against the parent. Orphans in the window are deleted and
+	committed before sleeping ``orphan_sweep_sleep_seconds`` to leave room for live
+	traffic. Returns the orphan count per child table.
+	"""
+	chunk_size = cint(frappe.conf.get("orphan_sweep_chunk_size")) or DEFAULT_CHUNK_SIZE
+	sleep_seconds = flt(frappe.conf.get("orphan_sweep_sleep_seconds", DEFAULT_SLEEP_SECONDS))
+
+	counts: dict[str, int] = {}
+	for parent_doctype in PARENT_DOCTYPES:
+		for child_doctype in get_child_doctypes(parent_doctype):
+			counts[f"{child_doctype} ({parent_doctype})"] = _sweep_table(
+				parent_doctype, child_doctype, chunk_size, sleep_seconds, dry_run
+			)
+
+	action = "Found" if dry_run else "Deleted"
+	frappe.logger("orphan_sweeper").info(f"{action} orphaned child rows: {counts}")
+	return counts
+
+
+def _sweep_table(
+	parent_doctype: str, child_doctype: str, chunk_size: int, sleep_seconds: float, dry_run: bool
+) -> int:
+	values = {"parenttype": parent_doctype, "last_name": "", "offset": chunk_size - 1}
+	total = 0
+
+	while True:
+		# Upper bound of the next window; the last window is open-ended.
+		upper = frappe.db.sql(
+			f"""
+			SELECT name FROM `tab{child_doctype}`
+			WHERE parenttype = %(parenttype)s AND name > %(last_name)s
+			ORDER BY name
+			LIMIT 1 OFFSET %(offset)s
+			""",
+			values,
+		)
+		values["upper_name"] = upper[0][0] if upper else None
+		upper_condition = "AND child.name <= %(upper_name)s" if upper else ""
+
+		orphans = frappe.db.sql_list(
+			f"""
+			SELECT child.name
+			FROM `tab{child_doctype}` child
+			LEFT JOIN `tab{parent_doctype}` parent ON parent.name = child.parent
+			WHERE child.parenttype = %(parenttype)s
+				AND child.name > %(last_name)s
+				{upper_condition}
+				AND parent.name IS NULL
+			""",
+			values,
+		)
+
+		if orphans and not dry_run:
+			frappe.db.sql(f"DELETE FROM `tab{child_doctype}` WHERE name IN %s", (tuple(orphans),))
+			frappe.db.commit()
+		total += len(orphans)
+
+		if not upper:
+			break
+
+		values["last_name"] = values["upper_name"]
+		if sleep_seconds:
+			time.sleep(sleep_seconds)
+
+	return total
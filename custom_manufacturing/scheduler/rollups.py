@@ -0,0 +1,8 @@
+"""Nightly reconciliation of the reporting rollup tables."""
+
+from custom_manufacturing.utils import breakdown_events, production_rollup
+
+
+def reconcile_rollups():
+	production_rollup.reconcile_recent()
+	breakdown_events.reconcile_recent()
@@ -0,0 +1,190 @@
+"""Cold storage for completed Job Cards.
+
+Submitted and cancelled Job Cards older than ``job_card_archive_days`` (site
+config, default 365) are moved with all their child rows into ``_archive_tab*``
+tables that mirror the live ones. Only cards whose Work Order is finished (or
+that have none) and that no submitted Stock Entry points to are moved, since
+open Work Orders re-sum their operations from the live Job Cards. The rollups,
+counters and Machine Breakdown Events are left in place, and their rebuilds read
+through :func:`get_source`, so the production reports keep covering archived
+history.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import frappe
+from frappe import _
+from frappe.utils import add_days, cint, getdate, today
+
+from custom_manufacturing.utils.bulk_delete import add_counts, delete_documents, get_child_doctypes
+
+ARCHIVED_DOCTYPE = "Job Card"
+DEFAULT_ARCHIVE_DAYS = 365
+DEFAULT_BATCH_SIZE = 500
+
+
+def get_archive_table(doctype: str) -> str:
+	return f"_archive_tab{doctype}"
+
+
+def get_archive_cutoff():
+	days = cint(frappe.conf.get("job_card_archive_days")) or DEFAULT_ARCHIVE_DAYS
+	return getdate(add_days(today(), -days))
+
+
+def reaches_archive(from_date) -> bool:
+	"""Whether a query starting at *from_date* may need archived Job Cards."""
+	return not from_date or getdate(from_date) < get_archive_cutoff()
+
+
+def get_source(doctype: str, columns: Sequence[str], from_date=None) -> str:
+	"""Return a table expression over live rows of *doctype*, plus archived ones when *from_date* reaches them.
+
+	Use it in place of ``tab{doctype}`` with an alias, selecting only *columns*. For
+	Job Card child tables pass the Job Cards' *from_date*.
+	"""
+	column_list = ", ".join(f"`{column}`" for column in columns)
+	archive_table = get_archive_table(doctype)
+	if not reaches_archive(from_date) or not _table_exists(archive_table):
+		return f"(SELECT {column_list} FROM `tab{doctype}`)"
+
+	return f"""(
+		SELECT {column_list} FROM `tab{doctype}`
+		UNION ALL
+		SELECT {column_list} FROM `{archive_table}`
+	)"""
+
+
+def get_job_card_source(columns: Sequence[str], from_date=None) -> str:
+	return get_source(ARCHIVED_DOCTYPE, columns, from_date)
+
+
+def archive_job_cards(batch_size: int = DEFAULT_BATCH_SIZE) -> dict[str, int]:
+	"""Move completed Job Cards of finished Work Orders past the horizon into the archive, one batch per commit."""
+	doctypes = [ARCHIVED_DOCTYPE, *get_child_doctypes(ARCHIVED_DOCTYPE)]
+	for doctype in doctypes:
+		ensure_archive_table(doctype)
+
+	values = {"cutoff": get_archive_cutoff(), "last_name": "", "batch_size": cint(batch_size)}
+	totals: dict[str, int] = {}
+
+	while True:
+		names = frappe.db.sql_list(
+			"""
+			SELECT jc.name
+			FROM `tabJob Card` jc
+			LEFT JOIN `tabWork Order` wo ON wo.name = jc.work_order
+			WHERE jc.docstatus IN (1, 2)
+				AND jc.posting_date < %(cutoff)s
+				AND jc.name > %(last_name)s
+				AND (wo.name IS NULL OR wo.status IN ('Completed', 'Closed', 'Cancelled'))
+				AND NOT EXISTS (
+					SELECT 1 FROM `tabStock Entry` se WHERE se.job_card = jc.name AND se.docstatus = 1
+				)
+			ORDER BY jc.name
+			LIMIT %(batch_size)s
+			""",
+			values,
+		)
+		if not names:
+			break
+
+		for doctype in doctypes:
+			_copy_rows(doctype, f"tab{doctype}", get_archive_table(doctype), names)
+		add_counts(totals, delete_documents(ARCHIVED_DOCTYPE, names))
+		frappe.db.commit()
+
+		values["last_name"] = names[-1]
+
+	frappe.logger("archive").info(f"Archived Job Cards before {values['cutoff']}: {totals or 'nothing'}")
+	return totals
+
+
+def get_archived_job_card(name: str) -> dict | None:
+	"""Return an archived Job Card as a dict with its child rows, or None."""
+	archive_table = get_archive_table(ARCHIVED_DOCTYPE)
+	if not _table_exists(archive_table):
+		return None
+
+	rows = frappe.db.sql(f"SELECT * FROM `{archive_table}` WHERE name = %s", name, as_dict=True)
+	if not rows:
+		return None
+
+	doc = rows[0]
+	for df in frappe.get_meta(ARCHIVED_DOCTYPE).get_table_fields():
+		child_table = get_archive_table(df.options)
+		doc[df.fieldname] = (
+			frappe.db.sql(
+				f"""
+				SELECT * FROM `{child_table}`
+				WHERE parent = %s AND parenttype = %s AND parentfield = %s
+				ORDER BY idx
+				""",
+				(name, ARCHIVED_DOCTYPE, df.fieldname),
+				as_dict=True,
+			)
+			if _table_exists(child_table)
+			else []
+		)
+
+	return doc
+
+
+def restore_job_card(name: str) -> None:
+	"""Move one archived Job Card and its child rows back into the live tables."""
+	if frappe.db.exists(ARCHIVED_DOCTYPE, name):
+		frappe.throw(_("Job Card {0} already exists.").format(frappe.bold(name)))
+	if not get_archived_job_card(name):
+		frappe.throw(_("Job Card {0} is not archived.").format(frappe.bold(name)))
+
+	for doctype in [ARCHIVED_DOCTYPE, *get_child_doctypes(ARCHIVED_DOCTYPE)]:
+		archive_table = get_archive_table(doctype)
+		if not _table_exists(archive_table):
+			continue
+
+		_copy_rows(doctype, archive_table, f"tab{doctype}", [name])
+		if doctype == ARCHIVED_DOCTYPE:
+			frappe.db.sql(f"DELETE FROM `{archive_table}` WHERE name = %s", name)
+		else:
+			frappe.db.sql(
+				f"DELETE FROM `{archive_table}` WHERE parent = %s AND parenttype = %s",
+				(name, ARCHIVED_DOCTYPE),
+			)
+
+
+def ensure_archive_table(doctype: str) -> None:
+	"""Create the archive table for *doctype*, or add columns the live table gained since."""
+	archive_table = get_archive_table(doctype)
+	if not _table_exists(archive_table):
+		frappe.db.sql_ddl(f"CREATE TABLE `{archive_table}` LIKE `tab{doctype}`")
+		return
+
+	archived_columns = set(_get_columns(archive_table))
+	for column in frappe.db.sql(f"SHOW COLUMNS FROM `tab{doctype}`", as_dict=True):
+		if column.Field not in archived_columns:
+			frappe.db.sql_ddl(f"ALTER TABLE `{archive_table}` ADD COLUMN `{column.Field}` {column.Type} NULL")
+
+
+def _copy_rows(doctype: str, source: str, target: str, names: Sequence[str]) -> None:
+	"""Copy the rows of *names* (parents, or children by parent) using the columns both tables share."""
+	target_columns = set(_get_columns(target))
+	columns = ", ".join(f"`{column}`" for column in _get_columns(source) if column in target_columns)
+	if doctype == ARCHIVED_DOCTYPE:
+		condition = "name IN %(names)s"
+	else:
+		condition = "parent IN %(names)s AND parenttype = %(parenttype)s"
+
+	frappe.db.sql(
+		f"INSERT INTO `{target}` ({columns}) SELECT {columns} FROM `{source}` WHERE {condition}",
+		{"names": tuple(names), "parenttype": ARCHIVED_DOCTYPE},
+	)
+
+
+def _get_columns(table: str) -> list[str]:
+	return [row[0] for row in frappe.db.sql(f"SHOW COLUMNS FROM `{table}`")]
+
+
+def _table_exists(table: str) -> bool:
+	return table in frappe.db.get_tables(cached=False)
@@ -0,0 +1,180 @@
+"""Bulk creation of finished-good Batches for a Work Order."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import frappe
+from erpnext.stock.doctype.batch.batch import make_batch
+from erpnext.stock.utils import get_valuation_method
+from frappe.model import default_fields
+from frappe.model.naming import NamingSeries, has_custom_parser, parse_naming_series
+from frappe.utils import add_days, cint, now, nowdate
+
+NUMBER_PLACEHOLDER = "\x00"
+
+
+def make_batches(
+	item_code: str, quantities: Sequence[float], reference_doctype: str, reference_name: str
+) -> list[str]:
+	"""Create one Batch per quantity and return their names in order.
+
+	The bulk path is taken only where the Batch controller would add nothing: the
+	item auto-creates batches with a ``batch_number_series`` that has one number
+	run and no document fields, is valued FIFO, and either has no expiry or a
+	shelf life to derive it from. Its names are reserved with one series update
+	and the rows inserted at once. Everything else, including a clash with existing
+	batches, goes through ``make_batch`` one by one.
+	"""
+	if not quantities:
+		return []
+
+	item = frappe.get_cached_value(
+		"Item",
+		item_code,
+		[
+			"item_name",
+			"stock_uom",
+			"has_batch_no",
+			"create_new_batch",
+			"batch_number_series",
+			"has_expiry_date",
+			"shelf_life_in_days",
+		],
+		as_dict=True,
+	)
+	if not item.has_batch_no:
+		return []
+
+	names = []
+	if _can_create_in_bulk(item_code, item):
+		names = _reserve_names(item.batch_number_series, len(quantities))
+
+	if not names:
+		return [
+			make_batch(
+				frappe._dict(
+					{
+						"item": item_code,
+						"qty_to_produce": qty,
+						"reference_doctype": reference_doctype,
+						"reference_name": reference_name,
+					}
+				)
+			)
+			for qty in quantities
+		]
+
+	timestamp = now()
+	user = frappe.session.user
+	manufacturing_date = nowdate()
+	expiry_date = add_days(manufacturing_date, item.shelf_life_in_days) if item.has_expiry_date else None
+	# same as Batch.set_batchwise_valuation for a FIFO item
+	use_batchwise_valuation = (
+		0 if frappe.db.get_single_value("Stock Settings", "do_not_use_batchwise_valuation") else 1
+	)
+
+	frappe.db.bulk_insert(
+		"Batch",
+		fields=[
+			"name",
+			"batch_id",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+			"item",
+			"item_name",
+			"stock_uom",
+			"qty_to_produce",
+			"reference_doctype",
+			"reference_name",
+			"manufacturing_date",
+			"expiry_date",
+			"use_batchwise_valuation",
+		],
+		values=[
+			(
+				name,
+				name,
+				timestamp,
+				timestamp,
+				user,
+				user,
+				item_code,
+				item.item_name,
+				item.stock_uom,
+				qty,
+				reference_doctype,
+				reference_name,
+				manufacturing_date,
+				expiry_date,
+				use_batchwise_valuation,
+			)
+			for name, qty in zip(names, quantities, strict=True)
+		],
+	)
+
+	return names
+
+
+def _can_create_in_bulk(item_code: str, item: frappe._dict) -> bool:
+	if not item.create_new_batch or not item.batch_number_series:
+		return False
+
+	# Batch.set_expiry_date throws when the expiry cannot be derived; let make_batch raise it
+	if item.has_expiry_date and not item.shelf_life_in_days:
+		return False
+
+	# Batch.set_batchwise_valuation turns batch-wise valuation off for non-FIFO items
+	if get_valuation_method(item_code) != "FIFO":
+		return False
+
+	return _is_doc_independent(item.batch_number_series)
+
+
+def _is_doc_independent(series: str) -> bool:
+	"""Whether the series resolves without a Batch document, i.e. has no field or custom parts."""
+	fieldnames = {df.fieldname for df in frappe.get_meta("Batch").fields} | set(default_fields)
+	for part in series.split("."):
+		if "{" in part or part in fieldnames or has_custom_parser(part):
+			return False
+
+	return True
+
+
+def _reserve_names(batch_number_series: str, count: int) -> list[str]:
+	"""Reserve *count* consecutive names from the series, or return [] without touching it.
+
+	The series row is locked before the names are checked against existing
+	batches, so a clash falls back without leaving a gap in the numbering.
+	"""
+	number_parts = []
+
+	def _capture(prefix, digits):
+		number_parts.append((prefix, digits))
+		return NUMBER_PLACEHOLDER
+
+	try:
+		template = parse_naming_series(NamingSeries(batch_number_series).series, number_generator=_capture)
+	except Exception:
+		return []
+
+	if len(number_parts) != 1 or template.count(NUMBER_PLACEHOLDER) != 1:
+		return []
+
+	prefix, digits = number_parts[0]
+	frappe.db.sql("INSERT IGNORE INTO `tabSeries` (`name`, `current`) VALUES (%s, 0)", prefix)
+	current = cint(
+		frappe.db.sql("SELECT `current` FROM `tabSeries` WHERE `name` = %s FOR UPDATE", prefix)[0][0]
+	)
+
+	names = [
+		template.replace(NUMBER_PLACEHOLDER, str(number).zfill(digits))
+		for number in range(current + 1, current + count + 1)
+	]
+	if frappe.db.exists("Batch", {"name": ("in", names)}):
+		return []
+
+	frappe.db.sql("UPDATE `tabSeries` SET `current` = %s WHERE `name` = %s", (current + count, prefix))
+	return names
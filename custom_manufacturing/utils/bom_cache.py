@@ -0,0 +1,258 @@
+"""Cached BOM explosions and operation plans, scaled linearly to the requested quantity.
+
+``get_bom_items_as_dict`` aggregates ``stock_qty / bom.quantity * qty``, so the
+explosion for one unit can be computed once per BOM version and multiplied out
+for any Work Order or Job Card quantity. Operation plans work the same way, with
+one time multiplier per BOM node of the tree.
+
+ERPNext's cost updates and the BOM Update Tool rewrite rates, hour rates,
+sub-assembly BOMs and exploded items without touching the BOM's ``modified``,
+so cache versions also cover the exploded rows and sub-assembly links, and
+rates, hour rates and Item Defaults are always read fresh.
+"""
+
+from __future__ import annotations
+
+import copy
+
+import frappe
+from erpnext.manufacturing.doctype.bom.bom import get_bom_items_as_dict
+from frappe.utils import flt
+
+CACHE_KEY_PREFIX = "custom_manufacturing:bom_explosion"
+OPERATION_PLAN_KEY_PREFIX = "custom_manufacturing:bom_operation_plan"
+CACHE_TTL = 24 * 60 * 60
+SCALED_FIELDS: tuple[str, ...] = ("qty", "amount")
+# read on every call, as they change without a new BOM version
+CURRENT_FIELDS: tuple[str, ...] = ("rate", "amount", "default_warehouse", "expense_account", "cost_center")
+# (Item Default field, linked doctype, Company field used when it is unset or of another company)
+ITEM_DEFAULT_FIELDS: tuple[tuple[str, str, str | None], ...] = (
+	("expense_account", "Account", "stock_adjustment_account"),
+	("cost_center", "Cost Center", "cost_center"),
+	("default_warehouse", "Warehouse", None),
+)
+OPERATION_FIELDS: list[str] = [
+	"operation",
+	"description",
+	"workstation",
+	"idx",
+	"workstation_type",
+	"time_in_mins",
+	"parent as bom",
+	"batch_size",
+	"sequence_id",
+	"fixed_time",
+]
+
+
+def get_scaled_bom_items(bom_no: str, company: str, qty: float, fetch_exploded: int = 1) -> dict:
+	"""Drop-in for ``get_bom_items_as_dict(bom_no, company, qty, fetch_exploded)``."""
+	items = copy.deepcopy(get_per_unit_bom_items(bom_no, company, fetch_exploded))
+	_set_current_values(items, bom_no, company, fetch_exploded)
+	for item in items.values():
+		for field in SCALED_FIELDS:
+			if item.get(field) is not None:
+				item[field] = flt(item[field]) * flt(qty)
+
+	return items
+
+
+def get_per_unit_bom_items(bom_no: str, company: str, fetch_exploded: int = 1) -> dict:
+	"""Return the one-unit explosion of *bom_no* without the fields in ``CURRENT_FIELDS``."""
+	# BOM.update_exploded_items re-inserts every exploded row, so their latest creation
+	# changes whenever the BOM Update Tool or a cost update rebuilds the explosion
+	bom_modified, exploded_at = frappe.db.sql(
+		"""
+		SELECT bom.modified, (
+			SELECT MAX(creation) FROM `tabBOM Explosion Item`
+			WHERE parent = bom.name AND parenttype = 'BOM'
+		)
+		FROM `tabBOM` bom
+		WHERE bom.name = %s
+		""",
+		bom_no,
+	)[0]
+	key = f"{CACHE_KEY_PREFIX}:{bom_no}:{company}:{int(bool(fetch_exploded))}:{bom_modified}:{exploded_at}"
+
+	items = frappe.cache().get_value(key)
+	if items is None:
+		items = get_bom_items_as_dict(bom_no, company, qty=1, fetch_exploded=fetch_exploded)
+		for item in items.values():
+			for field in CURRENT_FIELDS:
+				item.pop(field, None)
+		frappe.cache().set_value(key, items, expires_in_sec=CACHE_TTL)
+
+	return items
+
+
+def _set_current_values(items: dict, bom_no: str, company: str, fetch_exploded: int) -> None:
+	"""Fill in rates and Item Defaults the way ``get_bom_items_as_dict`` does, from the database."""
+	if not items:
+		return
+
+	item_codes = list(items)
+	rates = {}
+	for row in frappe.get_all(
+		"BOM Explosion Item" if fetch_exploded else "BOM Item",
+		filters={"parent": bom_no, "parenttype": "BOM", "item_code": ("in", item_codes)},
+		fields=["item_code", "rate"],
+		order_by="idx",
+	):
+		rates.setdefault(row.item_code, row.rate)
+
+	defaults = {
+		row.parent: row
+		for row in frappe.get_all(
+			"Item Default",
+			filters={"parent": ("in", item_codes), "parenttype": "Item", "company": company},
+			fields=["parent", "default_warehouse", "expense_account", "buying_cost_center as cost_center"],
+		)
+	}
+
+	companies = {}
+	for field, doctype, _company_field in ITEM_DEFAULT_FIELDS:
+		values = {row[field] for row in defaults.values() if row[field]}
+		if values:
+			companies[field] = dict(
+				frappe.get_all(
+					doctype, filters={"name": ("in", list(values))}, fields=["name", "company"], as_list=True
+				)
+			)
+
+	for item_code, item in items.items():
+		item["rate"] = flt(rates.get(item_code))
+		item["amount"] = flt(item.get("qty")) * item["rate"]
+
+		default = defaults.get(item_code) or {}
+		for field, _doctype, company_field in ITEM_DEFAULT_FIELDS:
+			value = default.get(field)
+			record_company = companies.get(field, {}).get(value)
+			if not value or (record_company and record_company != company):
+				value = frappe.get_cached_value("Company", company, company_field) if company_field else None
+			item[field] = value
+
+
+def get_bom_operations(bom_no: str, multi_level: bool = False) -> list[frappe._dict]:
+	"""Return the Work Order operations for *bom_no*, with times per unit of the BOM.
+
+	With *multi_level*, sub-assembly operations come first in reversed level order,
+	as ``BOMTree.level_order_traversal`` yields them, each scaled by its exploded
+	qty; the root BOM's own operations follow.
+	"""
+	key = f"{OPERATION_PLAN_KEY_PREFIX}:{bom_no}:{int(bool(multi_level))}"
+	plan = frappe.cache().get_value(key)
+	if not plan or _get_bom_versions(plan["versions"]) != plan["versions"]:
+		plan = _build_operation_plan(bom_no, multi_level)
+		frappe.cache().set_value(key, plan, expires_in_sec=CACHE_TTL)
+
+	# BOM.update_cost writes hour rates without a new BOM version, so they are read fresh
+	hour_rates = _get_hour_rates([bom for bom, _qty in plan["nodes"]])
+
+	operations = []
+	for bom, qty in plan["nodes"]:
+		for row in plan["operations"].get(bom, []):
+			row = frappe._dict(row)
+			row.hour_rate = hour_rates.get(row.pop("name"))
+			if not row.fixed_time:
+				row.time_in_mins = flt(row.time_in_mins) * flt(qty)
+			row.status = "Pending"
+			operations.append(row)
+
+	return operations
+
+
+def _build_operation_plan(bom_no: str, multi_level: bool) -> dict:
+	"""Resolve the BOM tree one level per query and load every node's operations at once."""
+	boms = _get_boms([bom_no])
+	traversal: list[tuple[str, float]] = []
+
+	level = [(bom_no, 1.0)]
+	while multi_level and level:
+		parents = list(dict.fromkeys(bom for bom, _exploded_qty in level))
+		children: dict[str, list] = {}
+		for row in frappe.db.sql(
+			"""
+			SELECT parent, bom_no, stock_qty
+			FROM `tabBOM Item`
+			WHERE parenttype = 'BOM' AND parent IN %(parents)s AND IFNULL(bom_no, '') != ''
+			ORDER BY parent, idx
+			""",
+			{"parents": parents},
+			as_dict=True,
+		):
+			children.setdefault(row.parent, []).append(row)
+
+		next_level = []
+		for bom, exploded_qty in level:
+			qty_per_unit = exploded_qty / flt(boms[bom].quantity)
+			for child in children.get(bom, []):
+				next_level.append((child.bom_no, qty_per_unit * flt(child.stock_qty)))
+
+		boms.update(_get_boms({bom for bom, _exploded_qty in next_level} - boms.keys()))
+		traversal.extend(next_level)
+		level = next_level
+
+	nodes = [(bom, exploded_qty / flt(boms[bom].quantity)) for bom, exploded_qty in reversed(traversal)]
+	nodes.append((bom_no, 1.0 / flt(boms[bom_no].quantity)))
+
+	operations: dict[str, list] = {}
+	for row in frappe.get_all(
+		"BOM Operation",
+		filters={"parent": ("in", list(boms)), "parenttype": "BOM"},
+		fields=["name", *OPERATION_FIELDS],
+		order_by="idx",
+	):
+		operations.setdefault(row.bom, []).append(row)
+
+	return {
+		"nodes": nodes,
+		"operations": operations,
+		"versions": _get_bom_versions(boms),
+	}
+
+
+def _get_boms(names) -> dict[str, frappe._dict]:
+	if not names:
+		return {}
+
+	return {
+		row.name: row
+		for row in frappe.db.sql(
+			"SELECT name, quantity, modified FROM `tabBOM` WHERE name IN %(names)s",
+			{"names": tuple(names)},
+			as_dict=True,
+		)
+	}
+
+
+def _get_bom_versions(names) -> dict[str, str]:
+	"""Version of each BOM: its ``modified`` plus the sub-assembly BOMs the BOM Update Tool swaps in place."""
+	children: dict[str, list[str]] = {}
+	for row in frappe.db.sql(
+		"""
+		SELECT parent, bom_no
+		FROM `tabBOM Item`
+		WHERE parenttype = 'BOM' AND parent IN %(names)s AND IFNULL(bom_no, '') != ''
+		ORDER BY parent, idx
+		""",
+		{"names": tuple(names)},
+		as_dict=True,
+	):
+		children.setdefault(row.parent, []).append(row.bom_no)
+
+	return {
+		name: f"{bom.modified}:{','.join(children.get(name, []))}" for name, bom in _get_boms(names).items()
+	}
+
+
+def _get_hour_rates(boms: list[str]) -> dict[str, float]:
+	return dict(
+		frappe.db.sql(
+			"""
+			SELECT name, base_hour_rate
+			FROM `tabBOM Operation`
+			WHERE parenttype = 'BOM' AND parent IN %(boms)s
+			""",
+			{"boms": tuple(set(boms))},
+		)
+	)
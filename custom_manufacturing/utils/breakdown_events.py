@@ -0,0 +1,146 @@
+"""One Machine Breakdown Event per breakdown Job Card, kept in step with the card."""
+
+from __future__ import annotations
+
+import frappe
+from frappe.utils import add_days, cint, flt, get_datetime, getdate, now, today
+
+from custom_manufacturing.utils.archive import get_source
+
+DOCTYPE = "Machine Breakdown Event"
+FIELDS: tuple[str, ...] = (
+	"job_card",
+	"workstation",
+	"breakdown_type",
+	"posting_date",
+	"start_time",
+	"end_time",
+	"downtime_mins",
+)
+
+DEFAULT_RECONCILE_DAYS = 7
+
+
+def sync_job_card(doc) -> None:
+	"""Create, refresh or drop the breakdown event of a Job Card."""
+	if doc.docstatus == 2 or not doc.get("custom_breakdown_type") or not doc.get("workstation"):
+		remove_job_card(doc.name)
+		return
+
+	from_times = [get_datetime(row.from_time) for row in doc.get("time_logs") or [] if row.from_time]
+	to_times = [get_datetime(row.to_time) for row in doc.get("time_logs") or [] if row.to_time]
+
+	_upsert(
+		doc.name,
+		(
+			doc.name,
+			doc.workstation,
+			doc.custom_breakdown_type,
+			doc.posting_date,
+			min(from_times) if from_times else None,
+			max(to_times) if to_times else None,
+			sum(flt(row.time_in_mins) for row in doc.get("time_logs") or []),
+		),
+	)
+
+
+def remove_job_card(job_card: str) -> None:
+	frappe.db.delete(DOCTYPE, {"name": job_card})
+
+
+def remove_job_cards(job_cards: list[str]) -> None:
+	if job_cards:
+		frappe.db.delete(DOCTYPE, {"name": ("in", job_cards)})
+
+
+def rebuild(from_date=None, to_date=None, chunk_size: int = 1000) -> int:
+	"""Recompute events for live and archived Job Cards posted in the range, one keyset chunk per commit."""
+	values: dict[str, object] = {"limit": chunk_size, "last_name": ""}
+	if from_date:
+		values["from_date"] = getdate(from_date)
+	if to_date:
+		values["to_date"] = getdate(to_date)
+
+	frappe.db.sql(f"DELETE FROM `tab{DOCTYPE}` WHERE {_date_conditions(values, 'posting_date')}", values)
+	job_card_conditions = _date_conditions(values, "jc.posting_date")
+	job_cards = get_source(
+		"Job Card", ("name", "docstatus", "workstation", "custom_breakdown_type", "posting_date"), from_date
+	)
+	time_logs = get_source(
+		"Job Card Time Log",
+		("parent", "parenttype", "parentfield", "from_time", "to_time", "time_in_mins"),
+		from_date,
+	)
+
+	total = 0
+	while True:
+		rows = frappe.db.sql(
+			f"""
+			SELECT
+				jc.name,
+				jc.workstation,
+				jc.custom_breakdown_type,
+				jc.posting_date,
+				MIN(tl.from_time),
+				MAX(tl.to_time),
+				COALESCE(SUM(tl.time_in_mins), 0)
+			FROM {job_cards} jc
+			LEFT JOIN {time_logs} tl
+				ON tl.parent = jc.name AND tl.parenttype = 'Job Card' AND tl.parentfield = 'time_logs'
+			WHERE jc.docstatus < 2
+				AND COALESCE(jc.custom_breakdown_type, '') != ''
+				AND COALESCE(jc.workstation, '') != ''
+				AND jc.name > %(last_name)s
+				AND {job_card_conditions}
+			GROUP BY jc.name
+			ORDER BY jc.name
+			LIMIT %(limit)s
+			""",
+			values,
+		)
+		if not rows:
+			break
+
+		for row in rows:
+			_upsert(row[0], row)
+		frappe.db.commit()
+
+		total += len(rows)
+		values["last_name"] = rows[-1][0]
+
+	return total
+
+
+def reconcile_recent() -> None:
+	days = cint(frappe.conf.get("production_rollup_reconcile_days")) or DEFAULT_RECONCILE_DAYS
+	total = rebuild(from_date=add_days(today(), -days), to_date=today())
+	frappe.logger().info(f"Reconciled {total} machine breakdown events")
+
+
+def _date_conditions(values: dict, column: str) -> str:
+	conditions = ["1 = 1"]
+	if values.get("from_date"):
+		conditions.append(f"{column} >= %(from_date)s")
+	if values.get("to_date"):
+		conditions.append(f"{column} <= %(to_date)s")
+	return " AND ".join(conditions)
+
+
+def _upsert(name: str, row) -> None:
+	timestamp = now()
+	user = frappe.session.user
+	values = dict(zip(FIELDS, row, strict=True))
+	values.update(name=name, creation=timestamp, modified=timestamp, owner=user, modified_by=user)
+
+	columns = ", ".join(f"`{column}`" for column in values)
+	placeholders = ", ".join(f"%({column})s" for column in values)
+	updates = ", ".join(f"`{column}` = VALUES(`{column}`)" for column in (*FIELDS, "modified", "modified_by"))
+
+	frappe.db.sql(
+		f"""
+		INSERT INTO `tab{DOCTYPE}` ({columns})
+		VALUES ({placeholders})
+		ON DUPLICATE KEY UPDATE {updates}
+		""",
+		values,
+	)
@@ -0,0 +1,282 @@
+"""Set-based deletion of documents together with their child table rows.
+
+These helpers bypass controllers and hooks. :func:`delete_docs` checks submitted
+documents and links the way ``frappe.delete_doc`` does and records Deleted
+Documents; the lower-level helpers leave it to callers to pick documents that are
+safe to drop (drafts, orphans, archived copies, ...).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from itertools import islice
+
+import frappe
+from frappe import _
+from frappe.model.delete_doc import raise_link_exists_exception
+from frappe.model.dynamic_links import get_dynamic_link_map
+from frappe.model.rename_doc import get_link_fields
+from frappe.utils import now
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def get_child_doctypes(doctype: str) -> list[str]:
+	return sorted({df.options for df in frappe.get_meta(doctype).get_table_fields()})
+
+
+def count_documents(doctype: str, names: Sequence[str]) -> dict[str, int]:
+	"""Return the rows :func:`delete_documents` would remove, per table."""
+	if not names:
+		return {}
+
+	counts = {}
+	for child_doctype in get_child_doctypes(doctype):
+		counts[child_doctype] = frappe.db.sql(
+			f"SELECT COUNT(*) FROM `tab{child_doctype}` WHERE parenttype = %s AND parent IN %s",
+			(doctype, tuple(names)),
+		)[0][0]
+	counts[doctype] = frappe.db.sql(
+		f"SELECT COUNT(*) FROM `tab{doctype}` WHERE name IN %s",
+		(tuple(names),),
+	)[0][0]
+
+	return counts
+
+
+def delete_documents(doctype: str, names: Sequence[str]) -> dict[str, int]:
+	"""Delete *names* and their child rows; returns the deleted row count per table."""
+	if not names:
+		return {}
+
+	counts = {}
+	for child_doctype in get_child_doctypes(doctype):
+		frappe.db.sql(
+			f"DELETE FROM `tab{child_doctype}` WHERE parenttype = %s AND parent IN %s",
+			(doctype, tuple(names)),
+		)
+		counts[child_doctype] = frappe.db._cursor.rowcount
+
+	frappe.db.sql(f"DELETE FROM `tab{doctype}` WHERE name IN %s", (tuple(names),))
+	counts[doctype] = frappe.db._cursor.rowcount
+
+	return counts
+
+
+def add_counts(total: dict[str, int], counts: dict[str, int]) -> None:
+	for table, count in counts.items():
+		total[table] = total.get(table, 0) + count
+
+
+def delete_docs(
+	doctype: str,
+	names: Sequence[str],
+	ignore_permissions: bool = False,
+	chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dict[str, int]:
+	"""Bulk counterpart of ``frappe.delete_doc`` for many documents of one doctype.
+
+	The whole set is validated before anything is deleted; then each chunk is
+	logged to Deleted Document and removed with its child rows, attachments,
+	comments, ToDos and the other records ``frappe.delete_doc`` cleans up.
+	Controller and ``doc_events`` hooks do not run, so callers handle their side
+	effects, including the validation done in ``on_trash``.
+	"""
+	names = list(dict.fromkeys(names))
+	if not names:
+		return {}
+
+	if not ignore_permissions:
+		frappe.has_permission(doctype, "delete", throw=True)
+
+	validate_deletable(doctype, names)
+
+	counts = {}
+	iterator = iter(names)
+	while chunk := list(islice(iterator, chunk_size)):
+		add_to_deleted_documents(doctype, chunk)
+		add_counts(counts, delete_documents(doctype, chunk))
+		delete_linked_records(doctype, chunk)
+
+	for name in names:
+		frappe.clear_document_cache(doctype, name)
+
+	return counts
+
+
+def validate_deletable(doctype: str, names: Sequence[str]) -> None:
+	"""Throw if any of *names* is submitted or linked from a document outside the set."""
+	if not names:
+		return
+
+	submitted = frappe.db.sql_list(
+		f"SELECT name FROM `tab{doctype}` WHERE docstatus = 1 AND name IN %s", (tuple(names),)
+	)
+	if submitted:
+		frappe.throw(
+			_("{0} {1}: Submitted Record cannot be deleted. You must Cancel it first.").format(
+				_(doctype), submitted[0]
+			)
+		)
+
+	ignored = set(frappe.get_hooks("ignore_links_on_delete"))
+	deleted = set(names)
+
+	def _check(linked_doctype, linked_name, name):
+		if linked_doctype in ignored or (linked_doctype == doctype and linked_name in deleted):
+			return
+
+		raise_link_exists_exception(frappe._dict(doctype=doctype, name=name), linked_doctype, linked_name)
+
+	for link in get_link_fields(doctype):
+		link_doctype, fieldname = link["parent"], link["fieldname"]
+		if link_doctype in ignored:
+			continue
+
+		if link.get("issingle"):
+			value = frappe.db.get_single_value(link_doctype, fieldname)
+			if value in deleted:
+				_check(link_doctype, link_doctype, value)
+			continue
+
+		try:
+			meta = frappe.get_meta(link_doctype)
+		except frappe.DoesNotExistError:
+			continue
+
+		fields = ["name", "docstatus", fieldname]
+		if meta.istable:
+			fields.extend(["parent", "parenttype"])
+
+		for row in frappe.db.get_values(link_doctype, {fieldname: ("in", names)}, fields, as_dict=True):
+			# cancelled documents do not block deletion, as in frappe.delete_doc
+			if row.docstatus == 2:
+				continue
+
+			if row.get("parent"):
+				_check(row.parenttype, row.parent, row[fieldname])
+			else:
+				_check(link_doctype, row.name, row[fieldname])
+
+	for df in get_dynamic_link_map().get(doctype, []):
+		if df.parent in ignored:
+			continue
+
+		meta = frappe.get_meta(df.parent)
+		if meta.issingle:
+			single = frappe.get_cached_doc(df.parent)
+			if single.get(df.options) == doctype and single.get(df.fieldname) in deleted:
+				_check(df.parent, df.parent, single.get(df.fieldname))
+			continue
+
+		parent_columns = ", `parent`, `parenttype`" if meta.istable else ""
+		for row in frappe.db.sql(
+			f"""
+			SELECT `name`, `docstatus`, `{df.fieldname}` AS linked_name {parent_columns}
+			FROM `tab{df.parent}`
+			WHERE `{df.options}` = %s AND `{df.fieldname}` IN %s AND docstatus < 2
+			""",
+			(doctype, tuple(names)),
+			as_dict=True,
+		):
+			if meta.istable:
+				_check(row.parenttype, row.parent, row.linked_name)
+			else:
+				_check(df.parent, row.name, row.linked_name)
+
+
+# (doctype, reference doctype field, reference name field) deleted along with the document
+LINKED_RECORDS = (
+	("ToDo", "reference_type", "reference_name"),
+	("Email Unsubscribe", "reference_doctype", "reference_name"),
+	("DocShare", "share_doctype", "share_name"),
+	("Version", "ref_doctype", "docname"),
+	("Comment", "reference_doctype", "reference_name"),
+	("View Log", "reference_doctype", "reference_name"),
+	("Document Follow", "ref_doctype", "ref_docname"),
+	("Notification Log", "document_type", "document_name"),
+	("Tag Link", "document_type", "document_name"),
+	("Communication Link", "link_doctype", "link_name"),
+)
+
+# (doctype, reference doctype field, reference name field) unlinked from the document
+UNLINKED_RECORDS = (
+	("Communication", "reference_doctype", "reference_name"),
+	("Activity Log", "reference_doctype", "reference_name"),
+	("Activity Log", "timeline_doctype", "timeline_name"),
+)
+
+
+def delete_linked_records(doctype: str, names: Sequence[str]) -> None:
+	"""Remove attachments and the records referring to *names*, as ``frappe.delete_doc`` does."""
+	if not names:
+		return
+
+	# File.on_trash removes the file from disk, so attachments go through the controller
+	for file in frappe.get_all(
+		"File", {"attached_to_doctype": doctype, "attached_to_name": ("in", names)}, pluck="name"
+	):
+		frappe.delete_doc("File", file, ignore_permissions=True)
+
+	for linked_doctype, doctype_field, name_field in LINKED_RECORDS:
+		frappe.db.delete(linked_doctype, {doctype_field: doctype, name_field: ("in", names)})
+
+	for linked_doctype, doctype_field, name_field in UNLINKED_RECORDS:
+		frappe.db.set_value(
+			linked_doctype,
+			{doctype_field: doctype, name_field: ("in", names)},
+			{doctype_field: None, name_field: None},
+			update_modified=False,
+		)
+
+
+def add_to_deleted_documents(doctype: str, names: Sequence[str]) -> None:
+	"""Record *names* in Deleted Document with one insert, so they can be restored."""
+	docs = get_documents_as_dict(doctype, names)
+	if not docs:
+		return
+
+	timestamp = now()
+	user = frappe.session.user
+	fields = ["creation", "modified", "owner", "modified_by", "deleted_doctype", "deleted_name", "data"]
+	values = [
+		(timestamp, timestamp, user, user, doctype, name, frappe.as_json(doc)) for name, doc in docs.items()
+	]
+
+	if frappe.get_meta("Deleted Document").autoname != "autoincrement":
+		fields.insert(0, "name")
+		values = [(frappe.generate_hash(length=10), *row) for row in values]
+
+	frappe.db.bulk_insert("Deleted Document", fields=fields, values=values)
+
+
+def get_documents_as_dict(doctype: str, names: Sequence[str]) -> dict[str, dict]:
+	"""Load *names* with their child tables, shaped like ``Document.as_dict``, in one query per table."""
+	if not names:
+		return {}
+
+	docs = {
+		row.name: {**row, "doctype": doctype}
+		for row in frappe.db.sql(
+			f"SELECT * FROM `tab{doctype}` WHERE name IN %s", (tuple(names),), as_dict=True
+		)
+	}
+	if not docs:
+		return {}
+
+	for df in frappe.get_meta(doctype).get_table_fields():
+		for doc in docs.values():
+			doc[df.fieldname] = []
+
+		for row in frappe.db.sql(
+			f"""
+			SELECT * FROM `tab{df.options}`
+			WHERE parenttype = %s AND parentfield = %s AND parent IN %s
+			ORDER BY idx
+			""",
+			(doctype, df.fieldname, tuple(docs)),
+			as_dict=True,
+		):
+			docs[row.parent][df.fieldname].append({**row, "doctype": df.options})
+
+	return docs
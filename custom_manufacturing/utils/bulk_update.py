@@ -0,0 +1,50 @@
+"""Multi-row ``UPDATE ... CASE`` writes for values that differ per document."""
+
+from __future__ import annotations
+
+from itertools import islice
+
+import frappe
+from frappe.utils import now
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def bulk_update(
+	doctype: str,
+	rows: dict[str, dict],
+	update_modified: bool = True,
+	chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> None:
+	"""Write ``{name: {fieldname: value}}`` with one statement per chunk of rows.
+
+	Rows may set different fields; a field missing from a row keeps its value.
+	"""
+	names = iter(rows)
+	while chunk := list(islice(names, chunk_size)):
+		_update_chunk(doctype, {name: rows[name] for name in chunk}, update_modified)
+
+
+def _update_chunk(doctype: str, rows: dict[str, dict], update_modified: bool) -> None:
+	fields = list(dict.fromkeys(field for values in rows.values() for field in values))
+	if not fields:
+		return
+
+	assignments = []
+	params: list = []
+	for field in fields:
+		cases = []
+		for name, values in rows.items():
+			if field in values:
+				cases.append("WHEN %s THEN %s")
+				params.extend((name, values[field]))
+		assignments.append(f"`{field}` = CASE `name` {' '.join(cases)} ELSE `{field}` END")
+
+	if update_modified:
+		assignments.extend(("`modified` = %s", "`modified_by` = %s"))
+		params.extend((now(), frappe.session.user))
+
+	frappe.db.sql(
+		f"UPDATE `tab{doctype}` SET {', '.join(assignments)} WHERE `name` IN %s",
+		(*params, tuple(rows)),
+	)
@@ -0,0 +1,48 @@
+"""Per-transaction queue of derived quantity updates, flushed once before commit.
+
+Work Order submit and cancel mark the bins, Production Plan rows, Sales Order
+Items and Material Requests they affect instead of recomputing them on the spot.
+Each handler then runs once, right before the transaction commits, with every
+distinct key queued for it, however many Work Orders touched the same key.
+A rollback discards the queue along with the changes that filled it.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Callable, Hashable
+
+import frappe
+
+QUEUE_ATTR = "custom_manufacturing_deferred_updates"
+
+
+def enqueue(handler: Callable[[list], None], key: Hashable) -> None:
+	"""Queue *key* for *handler*, which is called once with the list of all queued keys.
+
+	*handler* must be a module-level function so repeated calls share its queue.
+	"""
+	queue = getattr(frappe.local, QUEUE_ATTR, None)
+	if queue is None:
+		queue = {}
+		setattr(frappe.local, QUEUE_ATTR, queue)
+		frappe.db.before_commit.add(flush)
+		frappe.db.after_rollback.add(clear)
+
+	# re-queued keys move to the end so they are applied in the order of their last change
+	keys = queue.setdefault(handler, {})
+	keys.pop(key, None)
+	keys[key] = None
+
+
+def flush() -> None:
+	"""Run every handler with its queued keys; updates queued meanwhile start a new queue."""
+	queue = getattr(frappe.local, QUEUE_ATTR, None)
+	clear()
+
+	for handler, keys in (queue or {}).items():
+		handler(list(keys))
+
+
+def clear() -> None:
+	if hasattr(frappe.local, QUEUE_ATTR):
+		delattr(frappe.local, QUEUE_ATTR)
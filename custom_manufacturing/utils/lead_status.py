@@ -1,13 +1,29 @@
 from __future__ import annotations
 
-from typing import Iterable, Sequence
+from collections.abc import Iterable, Iterator, Sequence
+from itertools import islice
 
 import frappe
+from frappe import _
+from frappe.utils import now
 
+from custom_manufacturing.utils.bulk_update import bulk_update
 
-def recompute(lead: str | Sequence[str] | None = None, statuses: Iterable[str] | None = None) -> list[str]:
+DEFAULT_CHUNK_SIZE = 500
+WATERMARK_KEY = "custom_manufacturing_lead_status_watermark"
+
+
+def recompute(
+	lead: str | Sequence[str] | None = None,
+	statuses: Iterable[str] | None = None,
+	chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[str]:
 	"""Re-evaluate Lead status for the provided records.
 
+	Statuses are derived with grouped queries over Customers, Quotations and
+	Opportunities, following the precedence of Lead's status map, and written with
+	one batched UPDATE per chunk, committing after each chunk.
+
 	Args:
 	    lead: Optionally pass a single lead name or a list/tuple of names. When omitted,
 	        all leads filtered by *statuses* are recalculated.
@@ -17,31 +33,180 @@ def recompute(lead: str | Sequence[str] | None = None, statuses: Iterable[str] |
 	    List of lead names whose status changed during recomputation.
 	"""
 	if isinstance(lead, str):
-		targets = [lead]
+		chunks = _chunked([lead], chunk_size)
 	elif lead:
-		targets = list(lead)
+		chunks = _chunked(list(lead), chunk_size)
 	else:
 		statuses = tuple(statuses) if statuses else ("Opportunity",)
-		targets = frappe.get_all(
-			"Lead",
-			filters={"status": ["in", statuses], "docstatus": ["<", 2]},
-			pluck="name",
-		)
+		chunks = _iter_leads(statuses, chunk_size)
 
-	updated: list[str] = []
-	for lead_name in targets:
-		doc = frappe.get_doc("Lead", lead_name)
-		if doc.docstatus == 2:
-			continue
+	return _recompute_chunks(chunks)
+
+
+def recompute_incremental(chunk_size: int = DEFAULT_CHUNK_SIZE) -> list[str]:
+	"""Re-evaluate only leads whose Opportunities, Quotations or Customers changed since the last run.
+
+	The first run has no watermark and re-evaluates every lead. The watermark is the
+	start time of the previous successful run, so changes made while it ran are
+	picked up again next time.
+	"""
+	run_started = now()
+	since = frappe.db.get_global(WATERMARK_KEY)
+
+	if since:
+		updated = _recompute_chunks(_chunked(get_changed_leads(since), chunk_size))
+	else:
+		updated = _recompute_chunks(_iter_leads(None, chunk_size))
 
-		prev_status = doc.status
-		doc.set_status(update=True)
-		doc.reload()
+	frappe.db.set_global(WATERMARK_KEY, run_started)
+	frappe.db.commit()
+
+	frappe.logger("lead_status").info(f"Incremental lead status recompute changed {len(updated)} leads")
+	return updated
 
-		if doc.status != prev_status:
-			updated.append(doc.name)
 
-	if updated:
+def get_changed_leads(since: str) -> list[str]:
+	"""Leads linked to an Opportunity, Quotation or Customer modified or deleted after *since*."""
+	names = frappe.db.sql_list(
+		"""
+		SELECT party_name FROM `tabOpportunity` WHERE modified > %(since)s
+		UNION
+		SELECT party_name FROM `tabQuotation` WHERE modified > %(since)s
+		UNION
+		SELECT lead_name FROM `tabCustomer` WHERE modified > %(since)s
+		UNION
+		SELECT JSON_VALUE(data, '$.party_name') FROM `tabDeleted Document`
+		WHERE creation > %(since)s AND deleted_doctype IN ('Opportunity', 'Quotation')
+		UNION
+		SELECT JSON_VALUE(data, '$.lead_name') FROM `tabDeleted Document`
+		WHERE creation > %(since)s AND deleted_doctype = 'Customer'
+		""",
+		{"since": since},
+	)
+	return [name for name in names if name]
+
+
+def get_status_changes(leads: Sequence[str]) -> dict[str, str]:
+	"""Return ``{lead: new_status}`` for the leads whose derived status differs.
+
+	Precedence matches ``Lead.set_status``: Converted, Quotation, Opportunity, Lost
+	Quotation. A lead matching none of them keeps its status.
+	"""
+	if not leads:
+		return {}
+
+	rows = frappe.db.sql(
+		"""
+		SELECT l.name, l.status, CASE
+			WHEN c.lead_name IS NOT NULL THEN 'Converted'
+			WHEN q.has_open = 1 THEN 'Quotation'
+			WHEN o.party_name IS NOT NULL THEN 'Opportunity'
+			WHEN q.has_lost = 1 THEN 'Lost Quotation'
+		END AS new_status
+		FROM `tabLead` l
+		LEFT JOIN (
+			SELECT DISTINCT lead_name FROM `tabCustomer` WHERE lead_name IN %(leads)s
+		) c ON c.lead_name = l.name
+		LEFT JOIN (
+			SELECT party_name, MAX(status != 'Lost') AS has_open, MAX(status = 'Lost') AS has_lost
+			FROM `tabQuotation`
+			WHERE docstatus = 1 AND party_name IN %(leads)s
+			GROUP BY party_name
+		) q ON q.party_name = l.name
+		LEFT JOIN (
+			SELECT DISTINCT party_name FROM `tabOpportunity` WHERE status != 'Lost' AND party_name IN %(leads)s
+		) o ON o.party_name = l.name
+		WHERE l.name IN %(leads)s AND l.docstatus < 2
+		""",
+		{"leads": tuple(leads)},
+		as_dict=True,
+	)
+
+	new_statuses = {
+		row.name: row.new_status for row in rows if row.new_status and row.new_status != row.status
+	}
+	return {name: new_statuses[name] for name in leads if name in new_statuses}
+
+
+def apply_status_changes(changes: dict[str, str]) -> None:
+	"""Write new statuses and record the same "Label" comments ``set_status`` would add."""
+	bulk_update("Lead", {name: {"status": status} for name, status in changes.items()})
+
+	timestamp = now()
+	user = frappe.session.user
+	full_name = frappe.utils.get_fullname(user)
+	frappe.db.bulk_insert(
+		"Comment",
+		fields=[
+			"name",
+			"creation",
+			"modified",
+			"owner",
+			"modified_by",
+			"comment_type",
+			"reference_doctype",
+			"reference_name",
+			"comment_email",
+			"comment_by",
+			"content",
+		],
+		values=[
+			(
+				frappe.generate_hash(length=10),
+				timestamp,
+				timestamp,
+				user,
+				user,
+				"Label",
+				"Lead",
+				name,
+				user,
+				full_name,
+				_(status),
+			)
+			for name, status in changes.items()
+		],
+	)
+
+	for name in changes:
+		frappe.clear_document_cache("Lead", name)
+
+
+def _recompute_chunks(chunks: Iterable[list[str]]) -> list[str]:
+	updated: list[str] = []
+	for names in chunks:
+		changes = get_status_changes(names)
+		if not changes:
+			continue
+
+		apply_status_changes(changes)
 		frappe.db.commit()
+		updated.extend(changes)
 
 	return updated
+
+
+def _iter_leads(statuses: tuple[str, ...] | None, chunk_size: int) -> Iterator[list[str]]:
+	status_condition = "status IN %(statuses)s AND" if statuses else ""
+	last_name = ""
+	while True:
+		names = frappe.db.sql_list(
+			f"""
+			SELECT name FROM `tabLead`
+			WHERE {status_condition} docstatus < 2 AND name > %(last_name)s
+			ORDER BY name
+			LIMIT %(limit)s
+			""",
+			{"statuses": statuses, "last_name": last_name, "limit": chunk_size},
+		)
+		if not names:
+			return
+
+		yield names
+		last_name = names[-1]
+
+
+def _chunked(names: list[str], chunk_size: int) -> Iterator[list[str]]:
+	iterator = iter(names)
+	while chunk := list(islice(iterator, chunk_size)):
+		yield chunk
@@ -0,0 +1,84 @@
+"""Per work order and operation totals of submitted Job Card quantities."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import frappe
+from frappe.utils import flt
+
+from custom_manufacturing.utils.archive import get_job_card_source
+from custom_manufacturing.utils.rollup import insert_rows, upsert_increment
+
+DOCTYPE = "Work Order Production Counter"
+KEY_FIELDS: tuple[str, ...] = ("work_order", "operation")
+VALUE_FIELDS: tuple[str, ...] = ("completed_qty", "job_card_count")
+JOB_CARD_COLUMNS: tuple[str, ...] = ("work_order", "operation", "total_completed_qty", "docstatus")
+
+
+def apply_job_card(doc, sign: int = 1) -> None:
+	if not doc.get("work_order"):
+		return
+
+	upsert_increment(
+		DOCTYPE,
+		{"work_order": doc.work_order, "operation": doc.get("operation")},
+		{"completed_qty": sign * flt(doc.get("total_completed_qty")), "job_card_count": sign},
+	)
+
+
+def get_manufactured_qty(work_orders: Sequence[str], by_operation: bool = False) -> dict[str, dict]:
+	"""Return ``{work_order: {"total_qty", "operations"}}`` for every requested work order.
+
+	Totals come from the counter; work orders it has never seen are answered with
+	one grouped query over submitted Job Cards.
+	"""
+	work_orders = tuple(dict.fromkeys(wo for wo in work_orders if wo))
+	if not work_orders:
+		return {}
+
+	rows = frappe.db.sql(
+		f"""
+		SELECT work_order, operation, completed_qty AS qty
+		FROM `tab{DOCTYPE}`
+		WHERE work_order IN %(work_orders)s
+		""",
+		{"work_orders": work_orders},
+		as_dict=True,
+	)
+
+	missing = tuple(set(work_orders) - {row.work_order for row in rows})
+	if missing:
+		rows += frappe.db.sql(
+			f"""
+			SELECT work_order, operation, SUM(total_completed_qty) AS qty
+			FROM {get_job_card_source(JOB_CARD_COLUMNS)} jc
+			WHERE docstatus = 1 AND work_order IN %(work_orders)s
+			GROUP BY work_order, operation
+			""",
+			{"work_orders": missing},
+			as_dict=True,
+		)
+
+	result = {wo: {"total_qty": 0.0, "operations": {} if by_operation else None} for wo in work_orders}
+	for row in rows:
+		entry = result[row.work_order]
+		entry["total_qty"] += flt(row.qty)
+		if by_operation:
+			entry["operations"][row.operation] = entry["operations"].get(row.operation, 0.0) + flt(row.qty)
+
+	return result
+
+
+def rebuild() -> None:
+	"""Recount every work order from live and archived submitted Job Cards."""
+	frappe.db.delete(DOCTYPE)
+	rows = frappe.db.sql(
+		f"""
+		SELECT work_order, operation, SUM(total_completed_qty), COUNT(*)
+		FROM {get_job_card_source(JOB_CARD_COLUMNS)} jc
+		WHERE docstatus = 1 AND COALESCE(work_order, '') != ''
+		GROUP BY work_order, operation
+		"""
+	)
+	insert_rows(DOCTYPE, KEY_FIELDS, VALUE_FIELDS, rows)
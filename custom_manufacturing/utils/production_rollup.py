@@ -0,0 +1,164 @@
+"""Daily per-shift production rollups maintained from submitted Job Cards."""
+
+from __future__ import annotations
+
+import frappe
+from frappe.utils import add_days, cint, flt, getdate, today
+
+from custom_manufacturing.utils.archive import get_source
+from custom_manufacturing.utils.rollup import insert_rows, upsert_increment
+
+PRODUCTION_DOCTYPE = "Shift Production Rollup"
+SCRAP_DOCTYPE = "Shift Scrap Rollup"
+
+KEY_FIELDS: tuple[str, ...] = ("posting_date", "plant", "shift", "workstation", "production_item")
+PRODUCTION_FIELDS: tuple[str, ...] = (
+	"completed_qty",
+	"process_loss_qty",
+	"machine_time_mins",
+	"job_card_count",
+)
+SCRAP_KEY_FIELDS: tuple[str, ...] = (*KEY_FIELDS, "scrap_item_code")
+SCRAP_FIELDS: tuple[str, ...] = ("scrap_item_name", "scrap_qty")
+JOB_CARD_COLUMNS: tuple[str, ...] = (
+	"name",
+	"docstatus",
+	"posting_date",
+	"custom_plant_name",
+	"custom_shift_number",
+	"workstation",
+	"production_item",
+	"total_completed_qty",
+	"process_loss_qty",
+	"total_time_in_mins",
+)
+
+DEFAULT_RECONCILE_DAYS = 7
+
+
+def apply_job_card(doc, sign: int = 1) -> None:
+	"""Add (sign=1) or remove (sign=-1) a Job Card's contribution to the rollups."""
+	key = {
+		"posting_date": doc.get("posting_date"),
+		"plant": doc.get("custom_plant_name"),
+		"shift": doc.get("custom_shift_number"),
+		"workstation": doc.get("workstation"),
+		"production_item": doc.get("production_item"),
+	}
+
+	upsert_increment(
+		PRODUCTION_DOCTYPE,
+		key,
+		{
+			"completed_qty": sign * flt(doc.get("total_completed_qty")),
+			"process_loss_qty": sign * flt(doc.get("process_loss_qty")),
+			"machine_time_mins": sign * flt(doc.get("total_time_in_mins")),
+			"job_card_count": sign,
+		},
+	)
+
+	scrap: dict[str | None, list] = {}
+	for row in doc.get("scrap_items") or []:
+		entry = scrap.setdefault(row.item_code, [row.item_name, 0.0])
+		entry[1] += flt(row.stock_qty)
+
+	for item_code, (item_name, qty) in scrap.items():
+		upsert_increment(
+			SCRAP_DOCTYPE,
+			{**key, "scrap_item_code": item_code},
+			{"scrap_qty": sign * qty},
+			attributes={"scrap_item_name": item_name},
+		)
+
+
+def reconcile(from_date=None, to_date=None) -> int:
+	"""Recompute the rollups for every posting date in the range, committing per date.
+
+	Returns the number of posting dates rebuilt.
+	"""
+	conditions = ["posting_date IS NOT NULL"]
+	values: dict[str, object] = {}
+	if from_date:
+		conditions.append("posting_date >= %(from_date)s")
+		values["from_date"] = getdate(from_date)
+	if to_date:
+		conditions.append("posting_date <= %(to_date)s")
+		values["to_date"] = getdate(to_date)
+
+	where_clause = " AND ".join(conditions)
+	job_cards = get_source("Job Card", ("posting_date", "docstatus"), from_date)
+	posting_dates = frappe.db.sql_list(
+		f"""
+		SELECT posting_date FROM {job_cards} jc WHERE docstatus = 1 AND {where_clause}
+		UNION
+		SELECT posting_date FROM `tab{PRODUCTION_DOCTYPE}` WHERE {where_clause}
+		UNION
+		SELECT posting_date FROM `tab{SCRAP_DOCTYPE}` WHERE {where_clause}
+		ORDER BY posting_date
+		""",
+		values,
+	)
+
+	for posting_date in posting_dates:
+		rebuild_posting_date(posting_date)
+		frappe.db.commit()
+
+	return len(posting_dates)
+
+
+def reconcile_recent() -> None:
+	"""Nightly drift repair for the last few days of rollups."""
+	days = cint(frappe.conf.get("production_rollup_reconcile_days")) or DEFAULT_RECONCILE_DAYS
+	rebuilt = reconcile(from_date=add_days(today(), -days), to_date=today())
+	frappe.logger().info(f"Reconciled production rollups for {rebuilt} posting dates")
+
+
+def rebuild_posting_date(posting_date) -> None:
+	"""Rebuild one day of rollups from the live and, for archived dates, archived Job Cards."""
+	frappe.db.delete(PRODUCTION_DOCTYPE, {"posting_date": posting_date})
+	frappe.db.delete(SCRAP_DOCTYPE, {"posting_date": posting_date})
+
+	job_cards = get_source("Job Card", JOB_CARD_COLUMNS, posting_date)
+	production_rows = frappe.db.sql(
+		f"""
+		SELECT
+			posting_date,
+			custom_plant_name,
+			custom_shift_number,
+			workstation,
+			production_item,
+			SUM(total_completed_qty),
+			SUM(process_loss_qty),
+			SUM(total_time_in_mins),
+			COUNT(*)
+		FROM {job_cards} jc
+		WHERE docstatus = 1 AND posting_date = %(posting_date)s
+		GROUP BY custom_plant_name, custom_shift_number, workstation, production_item
+		""",
+		{"posting_date": posting_date},
+	)
+	insert_rows(PRODUCTION_DOCTYPE, KEY_FIELDS, PRODUCTION_FIELDS, production_rows)
+
+	scrap_items = get_source(
+		"Job Card Scrap Item", ("parent", "parenttype", "item_code", "item_name", "stock_qty"), posting_date
+	)
+	scrap_rows = frappe.db.sql(
+		f"""
+		SELECT
+			jc.posting_date,
+			jc.custom_plant_name,
+			jc.custom_shift_number,
+			jc.workstation,
+			jc.production_item,
+			scrap.item_code,
+			MAX(scrap.item_name),
+			SUM(scrap.stock_qty)
+		FROM {job_cards} jc
+		INNER JOIN {scrap_items} scrap
+			ON scrap.parent = jc.name AND scrap.parenttype = 'Job Card'
+		WHERE jc.docstatus = 1 AND jc.posting_date = %(posting_date)s
+		GROUP BY jc.custom_plant_name, jc.custom_shift_number, jc.workstation, jc.production_item, scrap.item_code
+		""",
+		{"posting_date": posting_date},
+	)
+	insert_rows(SCRAP_DOCTYPE, SCRAP_KEY_FIELDS, SCRAP_FIELDS, scrap_rows)
@@ -0,0 +1,117 @@
+"""Redis result cache for the app's script reports.
+
+A cached result is keyed by the report, its normalized filters and a watermark:
+a cheap aggregate (row count, latest ``modified``, ...) over the source tables in
+the filter scope. Any write to those rows changes the watermark, so stale
+entries are simply never read again and age out through the TTL or the LRU
+index.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+import zlib
+from collections.abc import Callable, Sequence
+
+import frappe
+from frappe import _
+from frappe.utils import cint, format_datetime, now
+
+CACHE_PREFIX = "custom_manufacturing:report_cache"
+LRU_INDEX_KEY = f"{CACHE_PREFIX}:lru"
+
+DEFAULT_TTL = 6 * 60 * 60
+DEFAULT_MAX_ENTRIES = 200
+
+
+def run_cached(report_name: str, filters: dict, watermark: Sequence, compute: Callable[[], Sequence]) -> list:
+	"""Return the report result for *filters*, computing it only on a cache miss.
+
+	*compute* returns the usual ``execute`` tuple. The message slot is replaced by
+	a header stating whether the result was served from cache.
+	"""
+	cache = frappe.cache()
+	key = f"{CACHE_PREFIX}:{_make_digest(report_name, filters, watermark)}"
+
+	payload = cache.get_value(key)
+	if payload:
+		entry = json.loads(zlib.decompress(payload))
+		_touch(cache, key)
+		return _with_header(entry["result"], cached=True, computed_on=entry["computed_on"])
+
+	result = list(compute())
+	computed_on = now()
+
+	payload = zlib.compress(
+		frappe.as_json({"computed_on": computed_on, "result": result}, indent=None).encode()
+	)
+	cache.set_value(key, payload, expires_in_sec=cint(frappe.conf.get("report_cache_ttl")) or DEFAULT_TTL)
+	_touch(cache, key)
+	_evict(cache)
+
+	return _with_header(result, cached=False, computed_on=computed_on)
+
+
+def get_table_watermark(
+	doctype: str,
+	where_clause: str = "1 = 1",
+	values: dict | None = None,
+	extra: str = "",
+	alias: str = "t",
+) -> tuple:
+	"""Return ``(count, max(modified)[, extra aggregates])`` for the rows in scope.
+
+	*extra* adds aggregates for columns that change without touching ``modified``.
+	"""
+	extra = f", {extra}" if extra else ""
+	row = frappe.db.sql(
+		f"""
+		SELECT COUNT(*), MAX({alias}.modified){extra}
+		FROM `tab{doctype}` {alias}
+		WHERE {where_clause}
+		""",
+		values or {},
+	)[0]
+	return tuple(str(value) for value in row)
+
+
+def normalize_filters(filters: dict) -> dict:
+	return {key: filters[key] for key in sorted(filters) if filters[key] not in (None, "", [], ())}
+
+
+def _make_digest(report_name: str, filters: dict, watermark: Sequence) -> str:
+	raw = json.dumps([report_name, normalize_filters(filters), list(watermark)], sort_keys=True, default=str)
+	return hashlib.md5(raw.encode()).hexdigest()
+
+
+def _with_header(result: list, cached: bool, computed_on: str) -> list:
+	result = list(result) + [None] * max(0, 3 - len(result))
+
+	if cached:
+		header = _("Showing cached result computed on {0}.").format(format_datetime(computed_on))
+	else:
+		header = _("Showing live result computed on {0}.").format(format_datetime(computed_on))
+
+	result[2] = f'<div class="text-muted small">{header}</div>'
+	return result
+
+
+def _touch(cache, key: str) -> None:
+	cache.zadd(cache.make_key(LRU_INDEX_KEY), {key: time.time()})
+
+
+def _evict(cache) -> None:
+	"""Drop the least recently used entries beyond the configured limit."""
+	index_key = cache.make_key(LRU_INDEX_KEY)
+	max_entries = cint(frappe.conf.get("report_cache_max_entries")) or DEFAULT_MAX_ENTRIES
+
+	excess = cache.zcard(index_key) - max_entries
+	if excess <= 0:
+		return
+
+	for key in cache.zrange(index_key, 0, excess - 1):
+		key = frappe.safe_decode(key)
+		cache.delete_value(key)
+		cache.zrem(index_key, key)
@@ -0,0 +1,134 @@
+"""Background exports that stream report rows straight into a private file.
+
+Each exportable report module provides ``get_export(filters)`` returning its
+columns and an iterator of row dicts. Rows are written as they are produced, so
+memory stays flat regardless of the date range.
+"""
+
+from __future__ import annotations
+
+import csv
+import hashlib
+import os
+from collections.abc import Iterator
+
+import frappe
+from frappe import _
+from frappe.utils import now_datetime
+
+EXPORTABLE_REPORTS = {
+	"Job Card Shift Summary": (
+		"custom_manufacturing.custom_manufacturing.report.job_card_shift_summary.job_card_shift_summary"
+	),
+	"Machine Breakdown Summary": (
+		"custom_manufacturing.custom_manufacturing.report.machine_breakdown_summary.machine_breakdown_summary"
+	),
+}
+FILE_FORMATS = ("CSV", "Excel")
+
+
+def enqueue_export(report_name: str, filters: dict, file_format: str = "CSV") -> None:
+	if report_name not in EXPORTABLE_REPORTS:
+		frappe.throw(_("Report {0} does not support background export.").format(frappe.bold(report_name)))
+	if file_format not in FILE_FORMATS:
+		frappe.throw(_("Unsupported export format {0}.").format(frappe.bold(file_format)))
+
+	frappe.enqueue(
+		"custom_manufacturing.utils.report_export.export_report",
+		queue="long",
+		timeout=3600,
+		report_name=report_name,
+		filters=filters,
+		file_format=file_format,
+		user=frappe.session.user,
+	)
+
+
+def export_report(report_name: str, filters: dict, file_format: str, user: str) -> str:
+	"""Write the report to a private file and notify *user*; returns the File name."""
+	module = frappe.get_module(EXPORTABLE_REPORTS[report_name])
+	columns, rows = module.get_export(frappe._dict(filters or {}))
+
+	extension = "xlsx" if file_format == "Excel" else "csv"
+	file_name = f"{frappe.scrub(report_name)}_{now_datetime():%Y%m%d_%H%M%S}_{frappe.generate_hash(length=6)}.{extension}"
+	path = frappe.get_site_path("private", "files", file_name)
+
+	if file_format == "Excel":
+		row_count = _write_xlsx(path, report_name, columns, rows)
+	else:
+		row_count = _write_csv(path, columns, rows)
+
+	file_doc = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": file_name,
+			"file_url": f"/private/files/{file_name}",
+			"is_private": 1,
+			"file_size": os.path.getsize(path),
+			"content_hash": _get_content_hash(path),
+			"attached_to_doctype": "Report",
+			"attached_to_name": report_name,
+		}
+	)
+	# with content_hash set, File.validate checks the file on disk without reading it into memory
+	file_doc.insert(ignore_permissions=True)
+
+	frappe.get_doc(
+		{
+			"doctype": "Notification Log",
+			"for_user": user,
+			"type": "Alert",
+			"document_type": "File",
+			"document_name": file_doc.name,
+			"subject": _("{0} export is ready ({1} rows).").format(report_name, row_count),
+			"link": file_doc.file_url,
+		}
+	).insert(ignore_permissions=True)
+	frappe.db.commit()
+
+	return file_doc.name
+
+
+def _get_content_hash(path: str) -> str:
+	"""Same digest as ``frappe.utils.get_content_hash``, computed in blocks."""
+	digest = hashlib.md5(usedforsecurity=False)
+	with open(path, "rb") as f:
+		while block := f.read(1 << 20):
+			digest.update(block)
+
+	return digest.hexdigest()
+
+
+def _write_csv(path: str, columns: list[dict], rows: Iterator[dict]) -> int:
+	fieldnames = [column["fieldname"] for column in columns]
+	count = 0
+
+	with open(path, "w", newline="", encoding="utf-8") as f:
+		writer = csv.writer(f)
+		writer.writerow([column["label"] for column in columns])
+		for row in rows:
+			writer.writerow([_format_value(row.get(fieldname)) for fieldname in fieldnames])
+			count += 1
+
+	return count
+
+
+def _write_xlsx(path: str, sheet_title: str, columns: list[dict], rows: Iterator[dict]) -> int:
+	from openpyxl import Workbook
+
+	fieldnames = [column["fieldname"] for column in columns]
+	count = 0
+
+	workbook = Workbook(write_only=True)
+	sheet = workbook.create_sheet(sheet_title[:31])
+	sheet.append([column["label"] for column in columns])
+	for row in rows:
+		sheet.append([row.get(fieldname) for fieldname in fieldnames])
+		count += 1
+
+	workbook.save(path)
+	return count
+
+
+def _format_value(value):
+	return "" if value is None else value
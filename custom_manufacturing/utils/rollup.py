@@ -0,0 +1,73 @@
+"""Helpers for additive rollup tables keyed by a fixed set of dimensions.
+
+Rollup rows are named by a hash of their key, so the primary key doubles as the
+unique constraint and increments can be applied with a single upsert.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Sequence
+
+import frappe
+from frappe.utils import now
+
+
+def get_rollup_name(key_values: Sequence) -> str:
+	raw = "\x1f".join("" if value is None else str(value) for value in key_values)
+	return hashlib.md5(raw.encode()).hexdigest()
+
+
+def upsert_increment(doctype: str, key: dict, increments: dict, attributes: dict | None = None) -> None:
+	"""Add *increments* to the row identified by *key*, creating it when missing.
+
+	*attributes* are descriptive columns written only when the row is created.
+	"""
+	if not any(increments.values()):
+		return
+
+	timestamp = now()
+	user = frappe.session.user
+	row = {
+		"name": get_rollup_name(list(key.values())),
+		"creation": timestamp,
+		"modified": timestamp,
+		"owner": user,
+		"modified_by": user,
+		**key,
+		**(attributes or {}),
+		**increments,
+	}
+
+	columns = ", ".join(f"`{column}`" for column in row)
+	placeholders = ", ".join(f"%({column})s" for column in row)
+	updates = ", ".join(
+		[f"`{field}` = `{field}` + VALUES(`{field}`)" for field in increments]
+		+ ["`modified` = VALUES(`modified`)", "`modified_by` = VALUES(`modified_by`)"]
+	)
+
+	frappe.db.sql(
+		f"""
+		INSERT INTO `tab{doctype}` ({columns})
+		VALUES ({placeholders})
+		ON DUPLICATE KEY UPDATE {updates}
+		""",
+		row,
+	)
+
+
+def insert_rows(doctype: str, key_fields: Sequence[str], value_fields: Sequence[str], rows) -> None:
+	"""Bulk insert freshly aggregated rollup rows (``rows`` yields key values followed by values)."""
+	timestamp = now()
+	user = frappe.session.user
+	key_count = len(key_fields)
+
+	values = [(get_rollup_name(row[:key_count]), timestamp, timestamp, user, user, *row) for row in rows]
+	if not values:
+		return
+
+	frappe.db.bulk_insert(
+		doctype,
+		fields=["name", "creation", "modified", "owner", "modified_by", *key_fields, *value_fields],
+		values=values,
+	)
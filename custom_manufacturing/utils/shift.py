@@ -0,0 +1,48 @@
+"""Cached Shift master lookups shared by reports."""
+
+from __future__ import annotations
+
+import re
+
+import frappe
+from frappe import _
+
+SHIFT_COLUMNS_CACHE_KEY = "custom_manufacturing:shift_column_labels"
+
+
+def get_shift_columns() -> list[dict]:
+	"""Return shifts ordered by shift number, each with the report column it pivots into.
+
+	The cache is shared by all users, so labels are stored untranslated and
+	translated into the caller's language here.
+	"""
+	columns = frappe.cache().get_value(SHIFT_COLUMNS_CACHE_KEY, generator=_build_shift_columns) or []
+	return [{**row, "label": _("{0} Qty").format(row["shift_label"])} for row in columns]
+
+
+def get_shift_column_index() -> dict[str, int]:
+	"""Map each Shift name to its position in :func:`get_shift_columns`."""
+	return {row["shift"]: idx for idx, row in enumerate(get_shift_columns())}
+
+
+def clear_shift_cache(doc=None, _method: str | None = None) -> None:
+	frappe.cache().delete_value(SHIFT_COLUMNS_CACHE_KEY)
+
+
+def _build_shift_columns() -> list[dict]:
+	shifts = frappe.get_all("Shift", fields=["name", "shift_number"])
+	shifts.sort(key=lambda row: _natural_key(row.shift_number or row.name))
+
+	return [
+		{
+			"shift": row.name,
+			"shift_label": row.shift_number or row.name,
+			"fieldname": f"shift_{idx}_qty",
+		}
+		for idx, row in enumerate(shifts, start=1)
+	]
+
+
+def _natural_key(value: str) -> tuple:
+	"""Sort "Shift 2" before "Shift 12" by comparing digit runs numerically."""
+	return tuple(int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", value or ""))
@@ -0,0 +1,141 @@
+"""Materialized Work Order → Batch mapping maintained from Stock Entries."""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+import frappe
+from frappe.utils import now
+
+DOCTYPE = "Work Order Batch"
+FIELDS = ["name", "work_order", "batch_no", "stock_entry", "creation", "modified", "owner", "modified_by"]
+LAST_CHANGED_KEY = "custom_manufacturing:work_order_batch:last_changed"
+
+
+def get_last_changed() -> str | None:
+	"""Time of the last committed change to the mapping, for use as a report cache watermark.
+
+	Kept in redis, so a flush resets it together with the report cache it guards.
+	"""
+	return frappe.cache().get_value(LAST_CHANGED_KEY)
+
+
+def get_work_order_batches(work_orders: Iterable[str]) -> dict[str, set[str]]:
+	"""Return the batches recorded against each work order."""
+	work_orders = tuple(wo for wo in set(work_orders) if wo)
+	if not work_orders:
+		return {}
+
+	rows = frappe.db.sql(
+		"""
+		SELECT DISTINCT work_order, batch_no
+		FROM `tabWork Order Batch`
+		WHERE work_order IN %(work_orders)s
+		""",
+		{"work_orders": work_orders},
+		as_dict=True,
+	)
+
+	result: dict[str, set[str]] = {}
+	for row in rows:
+		result.setdefault(row.work_order, set()).add(row.batch_no)
+
+	return result
+
+
+def sync_stock_entry(doc) -> None:
+	"""Record the batches of a submitted Stock Entry against its work order."""
+	if not doc.get("work_order"):
+		return
+
+	batch_nos: set[str] = {row.batch_no for row in doc.get("items") or [] if row.get("batch_no")}
+
+	bundles = tuple(
+		{row.serial_and_batch_bundle for row in doc.get("items") or [] if row.get("serial_and_batch_bundle")}
+	)
+	if bundles:
+		batch_nos.update(
+			frappe.db.sql_list(
+				"""
+				SELECT DISTINCT batch_no
+				FROM `tabSerial and Batch Entry`
+				WHERE parent IN %(bundles)s AND COALESCE(batch_no, '') != ''
+				""",
+				{"bundles": bundles},
+			)
+		)
+
+	remove_stock_entry(doc.name)
+	_insert_rows((doc.work_order, batch_no, doc.name) for batch_no in sorted(batch_nos))
+
+
+def remove_stock_entry(stock_entry: str) -> None:
+	frappe.db.delete(DOCTYPE, {"stock_entry": stock_entry})
+	_mark_changed()
+
+
+def backfill(chunk_size: int = 500) -> int:
+	"""Rebuild the mapping for every submitted work-order Stock Entry, one chunk per commit."""
+	last_name = ""
+	total = 0
+
+	while True:
+		stock_entries = frappe.db.sql_list(
+			"""
+			SELECT name
+			FROM `tabStock Entry`
+			WHERE docstatus = 1 AND COALESCE(work_order, '') != '' AND name > %(last_name)s
+			ORDER BY name
+			LIMIT %(limit)s
+			""",
+			{"last_name": last_name, "limit": chunk_size},
+		)
+		if not stock_entries:
+			break
+
+		rows = frappe.db.sql(
+			"""
+			SELECT DISTINCT se.work_order, sed.batch_no, se.name
+			FROM `tabStock Entry` se
+			INNER JOIN `tabStock Entry Detail` sed ON sed.parent = se.name
+			WHERE se.name IN %(stock_entries)s
+				AND COALESCE(sed.batch_no, '') != ''
+
+			UNION
+
+			SELECT DISTINCT se.work_order, sbe.batch_no, se.name
+			FROM `tabStock Entry` se
+			INNER JOIN `tabStock Entry Detail` sed ON sed.parent = se.name
+			INNER JOIN `tabSerial and Batch Entry` sbe ON sbe.parent = sed.serial_and_batch_bundle
+			WHERE se.name IN %(stock_entries)s
+				AND COALESCE(sed.serial_and_batch_bundle, '') != ''
+				AND COALESCE(sbe.batch_no, '') != ''
+			""",
+			{"stock_entries": tuple(stock_entries)},
+		)
+
+		frappe.db.delete(DOCTYPE, {"stock_entry": ("in", stock_entries)})
+		_insert_rows(rows)
+		_mark_changed()
+		frappe.db.commit()
+
+		total += len(rows)
+		last_name = stock_entries[-1]
+
+	return total
+
+
+def _insert_rows(rows: Iterable[tuple[str, str, str]]) -> None:
+	timestamp = now()
+	user = frappe.session.user
+	values = [
+		(frappe.generate_hash(length=10), work_order, batch_no, stock_entry, timestamp, timestamp, user, user)
+		for work_order, batch_no, stock_entry in rows
+	]
+	if values:
+		frappe.db.bulk_insert(DOCTYPE, fields=FIELDS, values=values)
+
+
+def _mark_changed() -> None:
+	# set after commit, so a report computed from uncommitted rows is never cached under the new value
+	frappe.db.after_commit.add(lambda: frappe.cache().set_value(LAST_CHANGED_KEY, now()))
@@ -0,0 +1,92 @@
+"""Live workstation state kept in redis and pushed to Plant Floor subscribers.
+
+Each plant floor has one redis hash mapping workstation to its current state.
+Job Cards update it when they switch a machine between "Production" and "Off";
+the change is written and published only once the transaction commits.
+"""
+
+from __future__ import annotations
+
+import frappe
+from frappe.utils import flt, now
+
+CACHE_KEY_PREFIX = "custom_manufacturing:workstation_status"
+REALTIME_EVENT = "workstation_status"
+
+
+def get_cache_key(plant_floor: str | None) -> str:
+	return f"{CACHE_KEY_PREFIX}:{plant_floor or ''}"
+
+
+def update_from_job_card(doc, status: str) -> None:
+	"""Queue the workstation state change of *doc* for after the current commit."""
+	if not doc.workstation:
+		return
+
+	frappe.db.after_commit.add(lambda: _write_and_publish(doc, status))
+
+
+def get_snapshot(plant_floor: str | None) -> list[dict]:
+	"""Return the current state of every workstation on *plant_floor*."""
+	states = frappe.cache().hgetall(get_cache_key(plant_floor))
+	if not states:
+		states = _rebuild(plant_floor)
+
+	return sorted(states.values(), key=lambda state: state["workstation"])
+
+
+def _write_and_publish(doc, status: str) -> None:
+	plant_floor = frappe.get_cached_value("Workstation", doc.workstation, "plant_floor")
+	cache_key = get_cache_key(plant_floor)
+	previous = frappe.cache().hget(cache_key, doc.workstation) or {}
+
+	state = _make_state(doc.workstation, status, doc if status == "Production" else None)
+	if {**previous, "updated_on": None} == {**state, "updated_on": None}:
+		return
+
+	frappe.cache().hset(cache_key, doc.workstation, state)
+	if plant_floor:
+		frappe.publish_realtime(REALTIME_EVENT, state, doctype="Plant Floor", docname=plant_floor)
+
+
+def _make_state(workstation: str, status: str | None, job_card=None) -> dict:
+	employees = (job_card.get("employee") or []) if job_card else []
+	return {
+		"workstation": workstation,
+		"status": status,
+		"job_card": job_card.name if job_card else None,
+		"work_order": job_card.get("work_order") if job_card else None,
+		"operation": job_card.get("operation") if job_card else None,
+		"employee": employees[0].employee if employees else None,
+		"started_time": str(job_card.started_time) if job_card and job_card.get("started_time") else None,
+		"completed_qty": flt(job_card.get("total_completed_qty")) if job_card else 0.0,
+		"updated_on": now(),
+	}
+
+
+def _rebuild(plant_floor: str | None) -> dict[str, dict]:
+	"""Seed an empty hash from the database, e.g. after redis was flushed."""
+	workstations = frappe.get_all(
+		"Workstation", filters={"plant_floor": plant_floor}, fields=["name", "status"], order_by="name"
+	)
+	if not workstations:
+		return {}
+
+	running = [ws.name for ws in workstations if ws.status == "Production"]
+	job_cards = {}
+	if running:
+		for name in frappe.get_all(
+			"Job Card",
+			filters={"workstation": ("in", running), "status": "Work In Progress", "docstatus": 0},
+			order_by="modified asc",
+			pluck="name",
+		):
+			doc = frappe.get_doc("Job Card", name)
+			job_cards[doc.workstation] = doc
+
+	states = {ws.name: _make_state(ws.name, ws.status, job_cards.get(ws.name)) for ws in workstations}
+	cache_key = get_cache_key(plant_floor)
+	for workstation, state in states.items():
+		frappe.cache().hset(cache_key, workstation, state)
+
+	return states